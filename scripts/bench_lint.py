@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+import os
+import glob
+import json
+import time
+import tempfile
+import platform
+import datetime
+import subprocess
+import tracemalloc
+import click
+import utils
+from utils import get_data_dir, load_yaml
+from lint_yaml import (validate_obj, compare_districts, validate_dir, Validator,
+                       PERSON_FIELDS, ORGANIZATION_FIELDS)
+from synthetic import generate_corpus
+
+DEFAULT_RESULTS = os.path.join(os.path.dirname(__file__), '../.benchmarks/lint.jsonl')
+
+
+def load_corpus(abbrs):
+    """ parsed (abbr, kind, basename, obj) for every file, so parsing isn't part of timings """
+    files = []
+    for abbr in abbrs:
+        for kind in ('people', 'retired', 'organizations'):
+            for filename in sorted(glob.glob(os.path.join(get_data_dir(abbr), kind, '*.yml'))):
+                with open(filename) as f:
+                    files.append((abbr, kind, os.path.basename(filename), load_yaml(f)))
+    return files
+
+
+def bench_validate_obj(settings, abbrs, files):
+    for abbr, kind, filename, obj in files:
+        validate_obj(obj, ORGANIZATION_FIELDS if kind == 'organizations' else PERSON_FIELDS)
+    return len(files)
+
+
+def validate_all(settings, abbrs, files):
+    validators = {abbr: Validator(settings, abbr) for abbr in abbrs}
+    # files are in people, retired, organizations order within each jurisdiction
+    for abbr, kind, filename, obj in files:
+        if kind == 'organizations':
+            validators[abbr].validate_org(obj, filename)
+        else:
+            validators[abbr].validate_person(obj, filename, retired=(kind == 'retired'))
+    return validators
+
+
+def bench_validator(settings, abbrs, files):
+    validate_all(settings, abbrs, files)
+    return len(files)
+
+
+def bench_compare_districts(validators, repeat=20):
+    for _ in range(repeat):
+        for validator in validators.values():
+            compare_districts(validator.expected, validator.active_legislators)
+    return repeat * sum(v.person_count for v in validators.values())
+
+
+def bench_process_dir(settings, abbrs, files):
+    for abbr in abbrs:
+        validate_dir(abbr, settings)
+    return len(files)
+
+
+def no_setup(settings, abbrs, files):
+    return (settings, abbrs, files)
+
+
+def compare_districts_setup(settings, abbrs, files):
+    return (validate_all(settings, abbrs, files),)
+
+
+# (name, setup, benchmark), only the benchmark is timed & it is passed setup's return value
+BENCHMARKS = (
+    ('validate_obj', no_setup, bench_validate_obj),
+    ('Validator.validate_person/org', no_setup, bench_validator),
+    ('compare_districts', compare_districts_setup, bench_compare_districts),
+    ('process_dir', no_setup, bench_process_dir),
+)
+
+
+def run_benchmark(setup, func, settings, abbrs, files):
+    """ returns a result dict with items processed, throughput & peak traced memory """
+    args = setup(settings, abbrs, files)
+    start = time.perf_counter()
+    items = func(*args)
+    elapsed = time.perf_counter() - start
+
+    # peak memory is measured on a second run since tracing slows everything down
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'items': items, 'seconds': round(elapsed, 4),
+            'per_second': round(items / elapsed, 1) if elapsed else None,
+            'peak_kb': peak // 1024}
+
+
+def get_commit():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                         cwd=os.path.dirname(__file__) or '.',
+                                         universal_newlines=True).strip()
+        dirty = subprocess.call(['git', 'diff', '--quiet', 'HEAD', '--', '.'],
+                                cwd=os.path.dirname(__file__) or '.')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('-dirty' if dirty else '')
+
+
+def load_previous(results_file, commit, scale):
+    """ the latest stored run at the same scale from a different commit, to compare against """
+    previous = None
+    try:
+        with open(results_file) as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get('commit') != commit and record.get('scale') == scale:
+                    previous = record
+    except FileNotFoundError:
+        pass
+    return previous
+
+
+def print_results(record, previous):
+    click.secho(f'{"benchmark":32} {"items":>8} {"seconds":>9} {"items/s":>11} '
+                f'{"peak KiB":>9}', bold=True)
+    for name, result in record['results'].items():
+        line = (f'{name:32} {result["items"]:8d} {result["seconds"]:9.3f} '
+                f'{result["per_second"] or 0:11.1f} {result["peak_kb"]:9d}')
+        color = None
+        if previous and name in previous['results'] and previous['results'][name]['per_second']:
+            before = previous['results'][name]['per_second']
+            change = (result['per_second'] - before) / before * 100
+            line += f' {change:+6.1f}%'
+            color = 'green' if change > 5 else 'red' if change < -5 else None
+        click.secho(line, fg=color)
+    if previous:
+        click.secho(f'compared to {previous["commit"]} at {previous["timestamp"]}')
+
+
+@click.command()
+@click.option('--corpus', type=click.Path(file_okay=False),
+              help='existing directory from synthetic.py, otherwise one is generated')
+@click.option('--states', default=50)
+@click.option('--people', default=150, help='active people per state')
+@click.option('--retired', default=10, help='retired people per state')
+@click.option('--committees', default=40, help='committees per state')
+@click.option('--results', 'results_file', default=DEFAULT_RESULTS,
+              type=click.Path(dir_okay=False), help='JSON lines file to append results to')
+@click.option('--save/--no-save', default=True)
+def bench_lint(corpus, states, people, retired, committees, results_file, save):
+    """ benchmark lint_yaml against a synthetic corpus & compare with earlier commits """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if corpus:
+            with open(os.path.join(corpus, 'settings.yml')) as f:
+                settings = load_yaml(f)
+        else:
+            corpus = tmpdir
+            click.secho(f'generating {states} states x {people} people...', fg='cyan')
+            settings = generate_corpus(corpus, states, people, retired, committees)
+
+        utils.DATA_ROOT = corpus
+        abbrs = sorted(settings)
+        files = load_corpus(abbrs)
+
+        record = {
+            'commit': get_commit(),
+            'timestamp': datetime.datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'scale': {'states': len(abbrs), 'files': len(files)},
+            'results': {name: run_benchmark(setup, func, settings, abbrs, files)
+                        for name, setup, func in BENCHMARKS},
+        }
+
+    print_results(record, load_previous(results_file, record['commit'], record['scale']))
+
+    if save:
+        os.makedirs(os.path.dirname(results_file), exist_ok=True)
+        with open(results_file, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+if __name__ == '__main__':
+    bench_lint()
@@ -0,0 +1,163 @@
+import re
+import time
+import click
+from contextlib import contextmanager
+
+SELECT_LIST_RE = re.compile(r'^SELECT (DISTINCT )?.*? FROM ', re.S)
+IN_LIST_RE = re.compile(r'\(%s(?:, %s)*\)')
+REPEATED_RE = re.compile(r'\(\.\.\.\)(?:, \(\.\.\.\))+')
+
+# the profiler that phase() & profile_file() report to, set by QueryProfiler.activate()
+_profiler = None
+
+
+def get_query_shape(sql):
+    """
+    sql with the selected columns, IN lists & multi-row VALUES collapsed, so similar
+    queries group together
+    """
+    sql = SELECT_LIST_RE.sub(r'SELECT \1... FROM ', sql)
+    return REPEATED_RE.sub('(...), ...', IN_LIST_RE.sub('(...)', sql))
+
+
+class QueryProfiler:
+    """
+    a connection.execute_wrapper counting queries & their time by phase, file & query shape
+
+    each tally is [queries, query seconds, wall seconds], wall time is only kept for phases
+    & files, it's everything spent inside them including parsing & Python work
+    """
+
+    def __init__(self):
+        self.current_phase = None
+        self.current_file = None
+        self.total = [0, 0.0, 0.0]
+        self.phases = {}
+        self.files = {}
+        self.shapes = {}
+        self.jurisdictions = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - start)
+
+    def record(self, sql, elapsed):
+        """ count a query that took elapsed seconds against the current phase & file """
+        self.total[0] += 1
+        self.total[1] += elapsed
+        for tallies, key in ((self.phases, self.current_phase),
+                             (self.files, self.current_file),
+                             (self.shapes, get_query_shape(sql))):
+            if key is not None:
+                tally = tallies.setdefault(key, [0, 0.0, 0.0])
+                tally[0] += 1
+                tally[1] += elapsed
+
+    @contextmanager
+    def activate(self):
+        global _profiler
+        previous, _profiler = _profiler, self
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total[2] += time.perf_counter() - start
+            _profiler = previous
+
+    def merge(self, other, label=None):
+        """ add another profiler's tallies, e.g. from a worker process, to this one """
+        for tallies, other_tallies in ((self.phases, other.phases), (self.files, other.files),
+                                       (self.shapes, other.shapes),
+                                       (self.jurisdictions, other.jurisdictions)):
+            for key, other_tally in other_tallies.items():
+                tally = tallies.setdefault(key, [0, 0.0, 0.0])
+                for n, value in enumerate(other_tally):
+                    tally[n] += value
+        for n, value in enumerate(other.total):
+            self.total[n] += value
+        if label:
+            self.jurisdictions[label] = list(other.total)
+
+    def to_dict(self):
+        def by_time(tallies):
+            return [{'name': key, 'queries': tally[0], 'query_seconds': round(tally[1], 4),
+                     'wall_seconds': round(tally[2], 4)}
+                    for key, tally in sorted(tallies.items(), key=lambda item: -item[1][2])]
+
+        return {
+            'total': {'queries': self.total[0], 'query_seconds': round(self.total[1], 4),
+                      'wall_seconds': round(self.total[2], 4)},
+            'phases': by_time(self.phases),
+            'jurisdictions': by_time(self.jurisdictions),
+            'files': by_time(self.files),
+            'shapes': [{'sql': shape, 'queries': tally[0], 'query_seconds': round(tally[1], 4)}
+                       for shape, tally in sorted(self.shapes.items(),
+                                                  key=lambda item: -item[1][0])],
+        }
+
+    def print_report(self, limit=10):
+        def print_tallies(title, tallies):
+            click.secho(f'{title:60} {"queries":>8} {"query s":>9} {"wall s":>9}', bold=True)
+            for name, tally in tallies:
+                click.secho(f'{name[-60:]:60} {tally[0]:8d} {tally[1]:9.3f} {tally[2]:9.3f}')
+
+        print_tallies('phase', sorted(self.phases.items(), key=lambda item: -item[1][2]))
+        if len(self.jurisdictions) > 1:
+            print_tallies('jurisdiction', sorted(self.jurisdictions.items(),
+                                                 key=lambda item: -item[1][2])[:limit])
+        print_tallies('slowest files', sorted(self.files.items(),
+                                              key=lambda item: -item[1][2])[:limit])
+
+        click.secho(f'{"most frequent queries":60} {"queries":>8} {"query s":>9}', bold=True)
+        for shape, tally in sorted(self.shapes.items(), key=lambda item: -item[1][0])[:limit]:
+            click.secho(f'{tally[0]:8d} {tally[1]:9.3f}  {shape[:200]}')
+
+        click.secho(f'{self.total[0]} queries taking {self.total[1]:.3f}s '
+                    f'of {self.total[2]:.3f}s', fg='green')
+
+
+@contextmanager
+def _track(attr, tallies_attr, key):
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    previous = getattr(profiler, attr)
+    setattr(profiler, attr, key)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tally = getattr(profiler, tallies_attr).setdefault(key, [0, 0.0, 0.0])
+        tally[2] += time.perf_counter() - start
+        setattr(profiler, attr, previous)
+
+
+def phase(name):
+    """ attribute the queries in this block to a phase, a no-op unless profiling """
+    return _track('current_phase', 'phases', name)
+
+
+def profile_file(filename):
+    """ attribute the queries in this block to a file, a no-op unless profiling """
+    return _track('current_file', 'files', filename)
+
+
+@contextmanager
+def untracked_query(sql):
+    """
+    record a statement that bypasses connection.execute_wrapper, like cursor.copy_expert,
+    a no-op unless profiling
+    """
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.record(sql, time.perf_counter() - start)
@@ -0,0 +1,113 @@
+import os
+import json
+import hashlib
+from utils import get_as_of_date
+
+
+def get_source_version(*filenames):
+    """ hash of the given source files, any change to the lint code invalidates the cache """
+    digest = hashlib.sha1()
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def get_end_dates(obj):
+    """ every end_date that role_is_active might compare against for this object """
+    return [str(role['end_date'])
+            for key in ('roles', 'party', 'memberships')
+            for role in obj.get(key, [])
+            if role.get('end_date')]
+
+
+def get_valid_window(end_dates, today):
+    """
+    the range of evaluation dates [valid_from, valid_until) for which every role in the
+    object is just as active as it is today, None means unbounded
+    """
+    valid_from = max((d for d in end_dates if d <= today), default=None)
+    valid_until = min((d for d in end_dates if d > today), default=None)
+    return valid_from, valid_until
+
+
+class LintCache:
+    """
+    per-jurisdiction cache of lint results, keyed by the hash of each file's content
+
+    each entry holds the errors that only depend on the file itself & the compact facts
+    that Validator needs for the cross-file checks, so unchanged files don't need to be
+    parsed at all
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir, abbr, source_version, today=None):
+        self.cache_dir = cache_dir
+        self.filename = os.path.join(cache_dir, f'{abbr}.json')
+        self.source_version = source_version
+        self.today = today or get_as_of_date()
+        self.entries = {}
+        self.used = {}
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            with open(self.filename) as f:
+                data = json.load(f)
+            if (data.get('format') == self.FORMAT_VERSION and
+                    data.get('source_version') == source_version):
+                self.entries = data['entries']
+        except (FileNotFoundError, ValueError):
+            pass
+
+    @staticmethod
+    def get_key(kind, content):
+        return kind + ':' + hashlib.sha1(content).hexdigest()
+
+    def _get_valid(self, key):
+        """ the entry for key if it is still valid today, otherwise None """
+        entry = self.entries.get(key)
+        if entry:
+            valid_from, valid_until = entry['valid']
+            if ((valid_from is None or valid_from <= self.today) and
+                    (valid_until is None or self.today < valid_until)):
+                return entry
+        return None
+
+    def get(self, kind, content):
+        """ returns (errors, facts) if content was linted before, otherwise None """
+        key = self.get_key(kind, content)
+        entry = self._get_valid(key)
+        if entry:
+            self.used[key] = entry
+            self.hits += 1
+            return entry['errors'], entry['facts']
+        self.misses += 1
+        return None
+
+    def keep(self, kind, content):
+        """ carry over the entry for a file this run skipped, so a later run can use it """
+        key = self.get_key(kind, content)
+        entry = self._get_valid(key)
+        if entry:
+            self.used[key] = entry
+
+    def put(self, kind, content, obj, errors, facts):
+        key = self.get_key(kind, content)
+        self.used[key] = {
+            'valid': get_valid_window(get_end_dates(obj), self.today),
+            'errors': errors,
+            'facts': facts,
+        }
+
+    def save(self):
+        """
+        write out the entries used (or kept) this run, dropping those for files that changed
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, 'w') as f:
+            json.dump({'format': self.FORMAT_VERSION,
+                       'source_version': self.source_version,
+                       'entries': self.used}, f)
+        os.replace(tmp_filename, self.filename)
@@ -0,0 +1,76 @@
+import json
+
+
+class JsonLinesReporter:
+    """ writes one JSON object per finding as soon as a file has been validated """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def report(self, abbr, path, errors, warnings):
+        for level, messages in (('error', errors), ('warning', warnings)):
+            for message in messages:
+                self.stream.write(json.dumps({'jurisdiction': abbr, 'path': path,
+                                              'level': level, 'message': message}) + '\n')
+        if errors or warnings:
+            self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class SarifReporter:
+    """
+    writes a SARIF 2.1.0 log, results are streamed into the results array as files are
+    validated and the document is completed by close()
+    """
+    HEADER = ('{"$schema": "https://json.schemastore.org/sarif-2.1.0.json", '
+              '"version": "2.1.0", '
+              '"runs": [{"tool": {"driver": {"name": "lint_yaml"}}, "results": [')
+    FOOTER = ']}]}\n'
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.first = True
+        self.stream.write(self.HEADER)
+
+    def report(self, abbr, path, errors, warnings):
+        for level, messages in (('error', errors), ('warning', warnings)):
+            for message in messages:
+                result = {'level': level,
+                          'message': {'text': message},
+                          'properties': {'jurisdiction': abbr}}
+                if path:
+                    result['locations'] = [
+                        {'physicalLocation': {'artifactLocation': {'uri': path}}}
+                    ]
+                self.stream.write(('\n' if self.first else ',\n') + json.dumps(result))
+                self.first = False
+        if errors or warnings:
+            self.stream.flush()
+
+    def close(self):
+        self.stream.write(self.FOOTER)
+        self.stream.flush()
+
+
+class BufferedReporter:
+    """ holds findings in a worker process so the parent can replay them in a stable order """
+
+    def __init__(self):
+        self.reports = []
+
+    def report(self, abbr, path, errors, warnings):
+        if errors or warnings:
+            self.reports.append((abbr, path, errors, warnings))
+
+    def replay(self, reporter):
+        for args in self.reports:
+            reporter.report(*args)
+        self.reports = []
+
+
+REPORTERS = {
+    'jsonl': JsonLinesReporter,
+    'sarif': SarifReporter,
+}
@@ -1,10 +1,17 @@
 #!/usr/bin/env python
 import re
 import os
-import yaml
 import glob
 import click
-from utils import get_data_dir, get_filename, role_is_active
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from utils import (get_data_dir, role_is_active, load_yaml, get_as_of_date,
+                   set_as_of_date)
+from lint_cache import LintCache, get_source_version
+from snapshot import open_refreshed
+from lint_report import REPORTERS, BufferedReporter
 from collections import defaultdict, Counter
 
 
@@ -12,6 +19,9 @@ DATE_RE = re.compile(r'^\d{4}(-\d{2}(-\d{2})?)?$')
 PHONE_RE = re.compile(r'^(1-)?\d{3}-\d{3}-\d{4}( ext. \d+)?$')
 UUID_RE = re.compile(r'^ocd-\w+/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
 LEGACY_OS_ID_RE = re.compile(r'[A-Z]{2}L\d{6}')
+DATA_PATH_RE = re.compile(r'^test/(\w+)/(people|retired|organizations)/([^/]+\.yml)$')
+FILENAME_UUID_RE = re.compile(r'([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})'
+                              r'\.yml$')
 
 
 class Missing:
@@ -177,51 +187,101 @@ PERSON_FIELDS = {
 }
 
 
-def validate_obj(obj, schema, prefix=None):
-    errors = []
+def _compile_field(field, validators):
+    """ build a function that appends the errors for a single field of an object """
+    if isinstance(validators, list):
+        required = Required in validators
+        checks = [(validator, validator.__name__) for validator in validators
+                  # required is handled on its own
+                  if validator is not Required]
+
+        def check_field(obj, prefix_str, errors):
+            value = obj.get(field, Missing)
+            if value is Missing:
+                if required:
+                    errors.append(f'{prefix_str}{field} missing')
+                # error or not, don't run other validators against missing fields
+                return
+            for validator, name in checks:
+                if not validator(value):
+                    errors.append(f'{prefix_str}{field} failed validation {name}: {value}')
 
-    if prefix:
-        prefix_str = '.'.join(prefix) + '.'
-    else:
-        prefix_str = ''
+    elif isinstance(validators, dict):
+        check_child = compile_schema(validators)
+        child_prefix = field + '.'
 
-    for field, validators in schema.items():
-        value = obj.get(field, Missing)
+        def check_field(obj, prefix_str, errors):
+            value = obj.get(field, Missing)
+            if value is not Missing:
+                check_child(value, child_prefix, errors)
 
-        if value is Missing:
-            if isinstance(validators, list) and Required in validators:
-                errors.append(f'{prefix_str}{field} missing')
-            # error or not, don't run other validators against missing fields
-            continue
+    elif isinstance(validators, NestedList) and isinstance(validators.subschema, dict):
+        # validate list elements against child schema
+        check_child = compile_schema(validators.subschema)
 
-        if isinstance(validators, list):
-            for validator in validators:
-                # required is checked above
-                if validator is Required:
-                    continue
-                if not validator(value):
-                    errors.append(
-                        f'{prefix_str}{field} failed validation {validator.__name__}: {value}'
-                    )
-        elif isinstance(validators, dict):
-            errors.extend(validate_obj(value, validators, [field]))
-        elif isinstance(validators, NestedList):
-            if isinstance(validators.subschema, dict):
-                # validate list elements against child schema
+        def check_field(obj, prefix_str, errors):
+            value = obj.get(field, Missing)
+            if value is not Missing:
                 for index, item in enumerate(value):
-                    errors.extend(validate_obj(item, validators.subschema, [field, str(index)]))
-            else:
-                # subschema can also be a validation function
+                    check_child(item, f'{field}.{index}.', errors)
+
+    elif isinstance(validators, NestedList):
+        # subschema can also be a validation function
+        validate_item = validators.subschema
+
+        def check_field(obj, prefix_str, errors):
+            value = obj.get(field, Missing)
+            if value is not Missing:
                 for index, item in enumerate(value):
-                    errors.extend(['.'.join([field, str(index)]) + ': ' + e
-                                   for e in validators.subschema(item)])
-        else:
-            raise Exception('invalid schema {}'.format(validators))
+                    errors.extend(f'{field}.{index}: {e}' for e in validate_item(item))
+
+    else:
+        raise Exception('invalid schema {}'.format(validators))
+
+    return check_field
+
+
+def compile_schema(schema):
+    """
+    turn a schema dict into a function with the signature check(obj, prefix_str, errors)
+
+    all of the dispatch on schema node types happens once here, instead of on every object
+    """
+    field_checks = [_compile_field(field, validators) for field, validators in schema.items()]
+    known_keys = frozenset(schema)
+
+    def check(obj, prefix_str, errors):
+        for check_field in field_checks:
+            check_field(obj, prefix_str, errors)
 
-    # check for extra items that went without validation
-    for key in set(obj.keys()) - set(schema.keys()):
-        errors.append(f'extra key: {prefix_str}{key}')
+        # check for extra items that went without validation
+        for key in obj.keys():
+            if key not in known_keys:
+                errors.append(f'extra key: {prefix_str}{key}')
 
+    return check
+
+
+# schemas are compiled once at import, keyed by identity since dicts aren't hashable
+COMPILED_SCHEMAS = {
+    id(schema): compile_schema(schema)
+    for schema in (LEGISLATIVE_ROLE_FIELDS, EXECUTIVE_ROLE_FIELDS,
+                   ORGANIZATION_FIELDS, PERSON_FIELDS)
+}
+
+
+def validate_obj(obj, schema, prefix=None):
+    if prefix:
+        prefix_str = '.'.join(prefix) + '.'
+    else:
+        prefix_str = ''
+
+    check = COMPILED_SCHEMAS.get(id(schema))
+    if check is None:
+        check = compile_schema(schema)
+
+    errors = []
+    check(obj, prefix_str, errors)
     return errors
 
 
@@ -273,19 +333,98 @@ def compare_districts(expected, actual):
             if len(actual[chamber][district]) < expected[chamber][district]:
                 warnings.append(f'missing legislator for {chamber} {district}')
             if len(actual[chamber][district]) > expected[chamber][district]:
-                people = '\n\t'.join(get_filename(o) for o in actual[chamber][district])
+                people = '\n\t'.join(p.filename for p in actual[chamber][district])
                 errors.append(f'extra legislator for {chamber} {district}:\n\t' + people)
     return errors, warnings
 
 
+OPTIONAL_FIELD_SET = set(('sort_name', 'given_name', 'family_name',
+                          'gender', 'summary', 'biography',
+                          'birth_date', 'death_date', 'image',
+                          'links', 'other_names', 'sources',
+                          ))
+
+
+def get_person_summary(person):
+    """ the compact, JSON-serializable facts about a person that feed print_summary """
+    role_type = None
+    district = None
+    for role in person.get('roles', []):
+        if role_is_active(role):
+            role_type = role['type']
+            district = role.get('district')
+            break
+
+    ids = list(person.get('ids', {}))
+    ids.extend(id['scheme'] for id in person.get('other_identifiers', []))
+
+    return {
+        'role_type': role_type,
+        'district': district,
+        'optional_fields': [key for key in person if key in OPTIONAL_FIELD_SET],
+        'extras': list(person.get('extras', {})),
+        'parties': [role['name'] for role in person.get('party', []) if role_is_active(role)],
+        'contact_types': [key for cd in person.get('contact_details', [])
+                          for key in cd if key != 'note'],
+        'ids': ids,
+    }
+
+
+def get_person_facts(person, retired=False):
+    facts = {'id': person['id'], 'name': person['name']}
+    if not retired:
+        facts['summary'] = get_person_summary(person)
+    return facts
+
+
+def get_org_summary(org):
+    """ the compact, JSON-serializable facts about an organization that feed print_summary """
+    if org['parent'].startswith('ocd-organization'):
+        parent_type = 'subcommittee'
+    else:
+        parent_type = org['parent']
+
+    return {
+        'parent_type': parent_type,
+        'missing_person_id': sum(1 for m in org['memberships'] if not m.get('id')),
+        'roles': [m.get('role', 'member') for m in org['memberships'] if role_is_active(m)],
+    }
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class PersonRecord:
+    """
+    the little that is kept about each active person for the end-of-run district checks,
+    so memory doesn't grow with the size of people files
+    """
+    __slots__ = ('id', 'name', 'filename', 'chamber', 'district')
+
+    def __init__(self, id, name, filename, chamber, district):
+        self.id = _intern(id)
+        self.name = _intern(name)
+        self.filename = _intern(filename)
+        self.chamber = _intern(chamber)
+        self.district = _intern(district)
+
+    def __repr__(self):
+        return f'PersonRecord({self.id!r}, {self.name!r}, {self.filename!r})'
+
+
+def _district_map():
+    # module-level so that a Validator can be pickled back from a worker process
+    return defaultdict(list)
+
+
 class Validator:
-    OPTIONAL_FIELD_SET = set(('sort_name', 'given_name', 'family_name',
-                              'gender', 'summary', 'biography',
-                              'birth_date', 'death_date', 'image',
-                              'links', 'other_names', 'sources',
-                              ))
+    OPTIONAL_FIELD_SET = OPTIONAL_FIELD_SET
 
-    def __init__(self, settings, abbr):
+    def __init__(self, settings, abbr, reporter=None):
+        self.abbr = abbr
+        # with a reporter, findings are handed off by flush_file instead of being kept
+        self.reporter = reporter
         self.http_whitelist = tuple(settings.get('http_whitelist', []))
         self.expected = get_expected_districts(settings[abbr])
         self.errors = defaultdict(list)
@@ -302,31 +441,65 @@ class Validator:
         self.id_counts = Counter()
         self.optional_fields = Counter()
         self.extra_counts = Counter()
-        self.active_legislators = defaultdict(lambda: defaultdict(list))
+        self.active_legislators = defaultdict(_district_map)
 
     def validate_person(self, person, filename, retired=False):
-        self.errors[filename] = validate_obj(person, PERSON_FIELDS)
-        self.errors[filename].extend(validate_roles(person, 'roles', retired))
-        self.errors[filename].extend(validate_roles(person, 'party'))
+        """
+        validate a parsed person & record it for the cross-file checks
+
+        returns (errors, facts), which add_person can replay without the parsed person
+        """
+        errors = validate_obj(person, PERSON_FIELDS)
+        errors.extend(validate_roles(person, 'roles', retired))
+        errors.extend(validate_roles(person, 'party'))
         # TODO: this was too ambitious, disabling this for now
         # self.warnings[filename] = self.check_https(person)
-        self.person_mapping[person['id']] = person['name']
+        facts = get_person_facts(person, retired)
+        self.add_person(facts, errors, filename, retired)
+        return errors, facts
+
+    def add_person(self, facts, errors, filename, retired=False):
+        # errors is None for people who are only needed for the cross-file checks
+        if errors is not None:
+            self.errors[filename] = list(errors)
+        self.person_mapping[_intern(facts['id'])] = _intern(facts['name'])
         if retired:
             self.retired_count += 1
         else:
-            self.summarize_person(person)
+            self.add_person_summary(facts['summary'], facts['id'], facts['name'], filename)
 
     def validate_org(self, org, filename):
-        self.errors[filename] = validate_obj(org, ORGANIZATION_FIELDS)
-        for m in org['memberships']:
-            if not m.get('id'):
-                continue
-            if m['id'] not in self.person_mapping:
-                self.errors[filename].append(f'invalid person ID {m["id"]}')
-            elif self.person_mapping[m['id']] != m['name']:
-                name = self.person_mapping[m['id']]
-                self.warnings[filename].append(f'ID {m["id"]} refers to {name}, not {m["name"]}')
-        self.summarize_org(org)
+        """
+        validate a parsed organization against the people seen so far
+
+        returns (errors, facts) like validate_person, errors are only those from the
+        organization itself, not the membership checks that depend on other files
+        """
+        errors = validate_obj(org, ORGANIZATION_FIELDS)
+        facts = {
+            'memberships': [[m['id'], m.get('name')] for m in org['memberships']
+                            if m.get('id')],
+            'summary': get_org_summary(org),
+        }
+        self.add_org(facts, errors, filename)
+        return errors, facts
+
+    def add_org(self, facts, errors, filename):
+        self.errors[filename] = list(errors)
+        for person_id, name in facts['memberships']:
+            if person_id not in self.person_mapping:
+                self.errors[filename].append(f'invalid person ID {person_id}')
+            elif self.person_mapping[person_id] != name:
+                mapped_name = self.person_mapping[person_id]
+                self.warnings[filename].append(f'ID {person_id} refers to {mapped_name}, '
+                                               f'not {name}')
+        self.add_org_summary(facts['summary'])
+
+    def flush_file(self, filename, path=None):
+        """ pass a validated file's findings to the reporter, if there is one """
+        if self.reporter:
+            self.reporter.report(self.abbr, path or filename,
+                                 self.errors.pop(filename, []), self.warnings.pop(filename, []))
 
     def check_https_url(self, url):
         if url and url.startswith('http://') and not url.startswith(self.http_whitelist):
@@ -347,48 +520,33 @@ class Validator:
                 warnings.append(f'sources.{i} URL {url} should be HTTPS')
         return warnings
 
-    def summarize_person(self, person):
-        role_type = None
-        district = None
+    def summarize_person(self, person, filename=None):
+        self.add_person_summary(get_person_summary(person), person.get('id'), person.get('name'),
+                                filename)
+
+    def add_person_summary(self, summary, id, name, filename):
+        role_type = summary['role_type']
+        district = summary['district']
 
         self.person_count += 1
-        self.optional_fields.update(set(person.keys()) & self.OPTIONAL_FIELD_SET)
-        self.extra_counts.update(person.get('extras', {}).keys())
-
-        for role in person.get('roles', []):
-            if role_is_active(role):
-                role_type = role['type']
-                district = role.get('district')
-                break
-        self.active_legislators[role_type][district].append(person)
-
-        for role in person.get('party', []):
-            if role_is_active(role):
-                self.parties[role['name']] += 1
-
-        for cd in person.get('contact_details', []):
-            for key in cd:
-                if key != 'note':
-                    self.contact_counts[key] += 1
-
-        for scheme in person.get('ids', {}):
-            self.id_counts[scheme] += 1
-        for id in person.get('other_identifiers', []):
-            self.id_counts[id['scheme']] += 1
+        self.optional_fields.update(summary['optional_fields'])
+        self.extra_counts.update(summary['extras'])
+        self.active_legislators[role_type][district].append(
+            PersonRecord(id, name, filename, role_type, district)
+        )
+        self.parties.update(summary['parties'])
+        self.contact_counts.update(summary['contact_types'])
+        self.id_counts.update(summary['ids'])
 
     def summarize_org(self, org):
-        self.org_count += 1
-
-        if org['parent'].startswith('ocd-organization'):
-            self.parent_types['subcommittee'] += 1
-        else:
-            self.parent_types[org['parent']] += 1
+        self.add_org_summary(get_org_summary(org))
 
-        for m in org['memberships']:
-            if not m.get('id'):
-                self.missing_person_id += 1
-            if role_is_active(m):
-                self.role_types[m.get('role', 'member')] += 1
+    def add_org_summary(self, summary):
+        self.org_count += 1
+        self.parent_types[summary['parent_type']] += 1
+        self.missing_person_id += summary['missing_person_id']
+        for role in summary['roles']:
+            self.role_types[role] += 1
 
     def print_validation_report(self, verbose):
         for fn, errors in self.errors.items():
@@ -400,7 +558,7 @@ class Validator:
                 for warning in warnings:
                     click.secho(' ' + warning, fg='yellow')
             if not errors and verbose > 0:
-                click.secho(fn, 'OK!', fg='green')
+                click.secho(f'{fn} OK!', fg='green')
 
         errors, warnings = compare_districts(self.expected, self.active_legislators)
         for err in errors:
@@ -408,6 +566,10 @@ class Validator:
         for warning in warnings:
             click.secho(warning, fg='yellow')
 
+    def report_districts(self, reporter):
+        errors, warnings = compare_districts(self.expected, self.active_legislators)
+        reporter.report(self.abbr, None, errors, warnings)
+
     def print_summary(self):
         click.secho(f'processed {self.person_count} active people, {self.retired_count} retired & '
                     f'{self.org_count} organizations', bold=True)
@@ -444,52 +606,258 @@ class Validator:
             click.secho(f'{count:4d} {role} roles')
 
 
-def process_dir(abbr, verbose, summary, settings):
+REPO_ROOT = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
+
+# any change to the lint code itself invalidates cached results
+LINT_SOURCE_VERSION = get_source_version(
+    __file__, os.path.join(os.path.dirname(__file__), 'utils.py'))
+
+
+def _validate_file(validator, filename, kind, cache, report=True, snapshot=None):
+    """
+    validate a single file, or if report is False, just record the facts about a person
+    that the cross-file checks depend on
+    """
+    print_filename = os.path.basename(filename)
+    path = os.path.relpath(os.path.realpath(filename), REPO_ROOT)
+    retired = kind == 'retired'
+
+    content = None
+    if cache:
+        with open(filename, 'rb') as f:
+            content = f.read()
+        cached = cache.get(kind, content)
+        if cached:
+            errors, facts = cached
+            if kind == 'organization':
+                validator.add_org(facts, errors, print_filename)
+            else:
+                validator.add_person(facts, errors if report else None, print_filename, retired)
+            if report:
+                validator.flush_file(print_filename, path)
+            return
+
+    if snapshot:
+        # only re-read if the file changed since the snapshot
+        obj = snapshot.load(filename)
+    else:
+        if content is None:
+            with open(filename, 'rb') as f:
+                content = f.read()
+        obj = load_yaml(content)
+    if not report:
+        validator.add_person(get_person_facts(obj, retired), None, print_filename, retired)
+        return
+
+    if kind == 'organization':
+        errors, facts = validator.validate_org(obj, print_filename)
+    else:
+        errors, facts = validator.validate_person(obj, print_filename, retired)
+    validator.flush_file(print_filename, path)
+    if cache:
+        cache.put(kind, content, obj, errors, facts)
+
+
+def validate_dir(abbr, settings, cache_dir=None, selected=None, snapshot=None, as_of=None,
+                 reporter=None):
+    """
+    validate a jurisdiction's files
+
+    if selected is a set of filenames only those files are reported on, other people are
+    only loaded for the cross-file checks and other organizations are skipped entirely
+
+    as_of is passed explicitly so that worker processes evaluate roles on the same date
+    """
+    if as_of:
+        set_as_of_date(as_of)
     person_filenames = glob.glob(os.path.join(get_data_dir(abbr), 'people', '*.yml'))
     retired_filenames = glob.glob(os.path.join(get_data_dir(abbr), 'retired', '*.yml'))
     org_filenames = glob.glob(os.path.join(get_data_dir(abbr), 'organizations', '*.yml'))
-    validator = Validator(settings, abbr)
+    validator = Validator(settings, abbr, reporter)
+    cache = LintCache(cache_dir, abbr, LINT_SOURCE_VERSION) if cache_dir else None
 
-    for filename in person_filenames:
-        print_filename = os.path.basename(filename)
-        with open(filename) as f:
-            person = yaml.load(f)
-            validator.validate_person(person, print_filename)
+    def is_selected(filename):
+        return selected is None or os.path.basename(filename) in selected
 
+    # people must come before organizations so memberships can be checked against them
+    for filename in person_filenames:
+        _validate_file(validator, filename, 'person', cache, is_selected(filename), snapshot)
     for filename in retired_filenames:
-        print_filename = os.path.basename(filename)
-        with open(filename) as f:
-            person = yaml.load(f)
-            validator.validate_person(person, print_filename, retired=True)
-
+        _validate_file(validator, filename, 'retired', cache, is_selected(filename), snapshot)
     for filename in org_filenames:
-        print_filename = os.path.basename(filename)
-        with open(filename) as f:
-            org = yaml.load(f)
-            validator.validate_org(org, print_filename)
-
-    validator.print_validation_report(verbose)
+        if is_selected(filename):
+            _validate_file(validator, filename, 'organization', cache, True, snapshot)
+        elif cache:
+            # not linted this run, but a later full run can still use its cached result
+            with open(filename, 'rb') as f:
+                cache.keep('organization', f.read())
+
+    if cache:
+        cache.save()
+
+    return validator
+
+
+def get_changed_paths(ref):
+    """
+    paths relative to the repository root that differ between ref & the working tree
+
+    untracked (but not ignored) files are included so new files are linted before staging
+    """
+    root = os.path.join(os.path.dirname(__file__), '..')
+    changed = subprocess.check_output(['git', 'diff', '--name-only', '--no-renames', ref, '--'],
+                                      cwd=root, universal_newlines=True)
+    untracked = subprocess.check_output(['git', 'ls-files', '--others', '--exclude-standard'],
+                                        cwd=root, universal_newlines=True)
+    return changed.splitlines() + untracked.splitlines()
+
+
+def group_changed_paths(paths):
+    """
+    map changed paths to {abbr: {(kind, filename), ...}}
+
+    returns None if a change (e.g. to settings.yml) affects every jurisdiction
+    """
+    changed = defaultdict(set)
+    for path in paths:
+        if path == 'settings.yml':
+            return None
+        match = DATA_PATH_RE.match(path)
+        if match:
+            abbr, kind, filename = match.groups()
+            changed[abbr].add((kind, filename))
+    return changed
+
+
+def get_affected_filenames(abbr, changed):
+    """
+    the filenames in abbr that need to be linted given its changed (kind, filename) pairs
+
+    this is every changed file that still exists plus any organization with a membership
+    pointing at a changed (or deleted) person, district counts are always re-checked
+    """
+    affected = {filename for kind, filename in changed}
+    person_ids = set()
+    for kind, filename in changed:
+        match = FILENAME_UUID_RE.search(filename)
+        if kind != 'organizations' and match:
+            person_ids.add(('ocd-person/' + match.group(1)).encode())
+
+    if person_ids:
+        for filename in glob.glob(os.path.join(get_data_dir(abbr), 'organizations', '*.yml')):
+            # a raw search is enough to find references & avoids parsing every committee
+            with open(filename, 'rb') as f:
+                content = f.read()
+            if any(person_id in content for person_id in person_ids):
+                affected.add(os.path.basename(filename))
+
+    return affected
+
+
+def print_report(validator, verbose, summary, reporter=None):
+    if reporter:
+        # files were already streamed, unless they were buffered in a worker process
+        if validator.reporter is not reporter:
+            validator.reporter.replay(reporter)
+        validator.report_districts(reporter)
+    else:
+        validator.print_validation_report(verbose)
 
     if summary:
         validator.print_summary()
 
 
+def process_dir(abbr, verbose, summary, settings, cache_dir=None, selected=None,
+                snapshot=None, reporter=None):
+    validator = validate_dir(abbr, settings, cache_dir, selected, snapshot, reporter=reporter)
+    print_report(validator, verbose, summary, reporter)
+
+
+def process_dirs_parallel(abbrs, verbose, summary, settings, jobs, cache_dir=None,
+                          selected=None, snapshot=None, reporter=None):
+    """
+    validate each jurisdiction in its own worker process
+
+    validators are pickled back to the parent and reported in the order of abbrs,
+    so output is identical no matter which worker finishes first
+    """
+    selected = selected or {}
+    worker_reporter = BufferedReporter() if reporter else None
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        validators = pool.map(validate_dir, abbrs, repeat(settings), repeat(cache_dir),
+                              [selected.get(abbr) for abbr in abbrs], repeat(snapshot),
+                              repeat(get_as_of_date()), repeat(worker_reporter))
+        for abbr, validator in zip(abbrs, validators):
+            if not reporter:
+                click.secho('==== {} ===='.format(abbr), bold=True)
+            print_report(validator, verbose, summary, reporter)
+
+
 @click.command()
 @click.argument('abbr', default='*')
 @click.option('-v', '--verbose', count=True)
 @click.option('--summary/--no-summary', default=False)
-def lint(abbr, verbose, summary):
+@click.option('-j', '--jobs', default=1, type=click.IntRange(1),
+              help='number of jurisdictions to lint in parallel')
+@click.option('--cache', 'cache_dir', type=click.Path(file_okay=False),
+              help='directory to keep results for unchanged files between runs')
+@click.option('--changed-since', metavar='REF',
+              help='only lint files affected by changes since this git ref')
+@click.option('--snapshot', 'snapshot_file', type=click.Path(dir_okay=False),
+              help='read parsed files from (and update) a snapshot made by snapshot.py')
+@click.option('--as-of', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='check which roles are active as of this date instead of today')
+@click.option('--format', 'output_format', default='text',
+              type=click.Choice(['text'] + sorted(REPORTERS)),
+              help='jsonl & sarif write each file\'s findings as soon as it is validated')
+def lint(abbr, verbose, summary, jobs, cache_dir, changed_since, snapshot_file, as_of,
+         output_format):
+    if as_of:
+        set_as_of_date(as_of.strftime('%Y-%m-%d'))
+    if summary and output_format != 'text':
+        raise click.UsageError('--summary is only available with --format text')
+
     settings_file = os.path.join(os.path.dirname(__file__), '../settings.yml')
     with open(settings_file) as f:
-        settings = yaml.load(f)
+        settings = load_yaml(f)
 
     if abbr == '*':
         all = [k for k in settings.keys() if k != 'http_whitelist' and k in os.listdir('test')]
-        for abbr in all:
-            click.secho('==== {} ===='.format(abbr), bold=True)
-            process_dir(abbr, verbose, summary, settings)
     else:
-        process_dir(abbr, verbose, summary, settings)
+        all = [abbr]
+
+    selected = {}
+    if changed_since:
+        changed = group_changed_paths(get_changed_paths(changed_since))
+        # None means that every jurisdiction needs a full lint
+        if changed is not None:
+            all = [a for a in all if a in changed]
+            selected = {a: get_affected_filenames(a, changed[a]) for a in all}
+            if not all:
+                click.secho(f'no changes to lint since {changed_since}', fg='green')
+                return
+
+    snapshot = open_refreshed(snapshot_file, all) if snapshot_file else None
+
+    reporter = None
+    if output_format != 'text':
+        reporter = REPORTERS[output_format](sys.stdout)
+
+    if abbr != '*':
+        process_dir(abbr, verbose, summary, settings, cache_dir, selected.get(abbr), snapshot,
+                    reporter)
+    elif jobs > 1:
+        process_dirs_parallel(all, verbose, summary, settings, jobs, cache_dir, selected,
+                              snapshot, reporter)
+    else:
+        for abbr in all:
+            if not reporter:
+                click.secho('==== {} ===='.format(abbr), bold=True)
+            process_dir(abbr, verbose, summary, settings, cache_dir, selected.get(abbr),
+                        snapshot, reporter)
+
+    if reporter:
+        reporter.close()
 
 
 if __name__ == '__main__':
@@ -2,7 +2,8 @@
 import os
 import glob
 import click
-from utils import load_yaml, dump_obj, role_is_active
+from utils import dump_obj, role_is_active
+from snapshot import Snapshot, load_file
 
 
 def retire_from_committee(committee, person_id, end_date):
@@ -32,20 +33,24 @@ def move_file(filename):
 @click.command()
 @click.argument('end_date')
 @click.argument('filename')
-def retire(end_date, filename):
+@click.option('--snapshot', 'snapshot_file', type=click.Path(dir_okay=False),
+              help='read parsed files from (and update) a snapshot made by snapshot.py')
+def retire(end_date, filename, snapshot_file):
+    snapshot = Snapshot(snapshot_file) if snapshot_file else None
+
     # end the person's active roles & re-save
-    with open(filename) as f:
-        person = load_yaml(f)
+    person = load_file(filename, snapshot)
     person, num = retire_person(person, end_date)
-    dump_obj(person, filename=filename)
+    dump_obj(person, filename=filename, if_changed=True)
 
-    # same for their committees
+    # same for their committees, only rewriting the ones they were on
     committee_glob = os.path.join(os.path.dirname(filename), '../organizations/*.yml')
+    num_committees = 0
     for com_filename in glob.glob(committee_glob):
-        with open(com_filename) as f:
-            committee = load_yaml(f)
+        committee = load_file(com_filename, snapshot)
         committee, num_roles = retire_from_committee(committee, person['id'], end_date)
-        dump_obj(committee, filename=com_filename)
+        if num_roles and dump_obj(committee, filename=com_filename, if_changed=True):
+            num_committees += 1
         num += num_roles
 
     if num == 0:
@@ -54,9 +59,15 @@ def retire(end_date, filename):
         click.secho(f'retired person')
     else:
         click.secho(f'retired person from {num} roles')
+    if num_committees:
+        click.secho(f'updated {num_committees} committee files')
 
     move_file(filename)
 
+    # files we rewrote are re-parsed next time since their mtime changed
+    if snapshot:
+        snapshot.save()
+
 
 if __name__ == '__main__':
     retire()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+import os
+import glob
+import click
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from utils import get_data_dir, get_as_of_date, set_as_of_date
+from snapshot import Snapshot, load_file
+
+
+def interval_contains(start_date, end_date, date):
+    """
+    whether a role with these dates was held on date
+
+    end_date is exclusive to match role_is_active, and None means unbounded on either side
+    """
+    return ((start_date is None or start_date <= date) and
+            (end_date is None or end_date > date))
+
+
+class RoleIndex:
+    """
+    interval index over every role, party & committee membership in a set of files
+
+    keys are ('seat', chamber, district), ('party', name) and ('committee', org_id), for
+    each key the sorted start/end dates split time into segments & each interval is stored
+    in the O(log n) nodes of a segment tree that cover its segments, so looking up who held
+    something on a date only walks from that date's segment to the root
+    """
+
+    def __init__(self):
+        self.intervals = defaultdict(list)
+        self.trees = None
+
+    def add_interval(self, key, holder, role):
+        start_date = role.get('start_date')
+        end_date = role.get('end_date')
+        self.intervals[key].append((start_date and str(start_date), end_date and str(end_date),
+                                    holder))
+        self.trees = None
+
+    def add_person(self, person):
+        holder = (person['id'], person['name'])
+        for role in person.get('roles', []):
+            self.add_interval(('seat', role['type'], str(role.get('district'))), holder, role)
+        for party in person.get('party', []):
+            self.add_interval(('party', party['name']), holder, party)
+
+    def add_org(self, org):
+        for membership in org.get('memberships', []):
+            holder = (membership.get('id'), membership['name'])
+            self.add_interval(('committee', org['id']), holder, membership)
+
+    def build(self):
+        self.trees = {}
+        for key, intervals in self.intervals.items():
+            breakpoints = sorted({date for start_date, end_date, _ in intervals
+                                  for date in (start_date, end_date) if date is not None})
+            # segment 0 is before the first breakpoint, segment n starts at breakpoint n - 1
+            size = len(breakpoints) + 1
+            nodes = [[] for _ in range(2 * size)]
+            for n, (start_date, end_date, _) in enumerate(intervals):
+                first = 0 if start_date is None else bisect_right(breakpoints, start_date)
+                # end_date is exclusive, the last segment is the one ending there
+                last = size - 1 if end_date is None else bisect_left(breakpoints, end_date)
+                left, right = first + size, last + size + 1
+                while left < right:
+                    if left & 1:
+                        nodes[left].append(n)
+                        left += 1
+                    if right & 1:
+                        right -= 1
+                        nodes[right].append(n)
+                    left >>= 1
+                    right >>= 1
+            self.trees[key] = (breakpoints, nodes)
+
+    def lookup(self, key, date=None):
+        """ the (id, name) pairs that held key on date, or the as-of date if not given """
+        if self.trees is None:
+            self.build()
+        if date is None:
+            date = get_as_of_date()
+        if key not in self.trees:
+            return ()
+        breakpoints, nodes = self.trees[key]
+        found = []
+        node = bisect_right(breakpoints, date) + len(breakpoints) + 1
+        while node:
+            found.extend(nodes[node])
+            node >>= 1
+        # in the order they were added
+        intervals = self.intervals[key]
+        return tuple(intervals[n][2] for n in sorted(found))
+
+    def seat(self, chamber, district, date=None):
+        return self.lookup(('seat', chamber, str(district)), date)
+
+    def party(self, name, date=None):
+        return self.lookup(('party', name), date)
+
+    def committee(self, org_id, date=None):
+        return self.lookup(('committee', org_id), date)
+
+
+def build_index(abbr, snapshot=None):
+    index = RoleIndex()
+    for directory in ('people', 'retired'):
+        for filename in glob.glob(os.path.join(get_data_dir(abbr), directory, '*.yml')):
+            index.add_person(load_file(filename, snapshot))
+    for filename in glob.glob(os.path.join(get_data_dir(abbr), 'organizations', '*.yml')):
+        index.add_org(load_file(filename, snapshot))
+    index.build()
+    return index
+
+
+@click.command()
+@click.argument('abbr')
+@click.option('--seat', metavar='CHAMBER/DISTRICT', help='e.g. lower/3')
+@click.option('--party')
+@click.option('--committee', metavar='ORG_ID')
+@click.option('--as-of', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='date to look up, defaults to today')
+@click.option('--snapshot', 'snapshot_file', type=click.Path(dir_okay=False),
+              help='read parsed files from (and update) a snapshot made by snapshot.py')
+def role_index(abbr, seat, party, committee, as_of, snapshot_file):
+    """ show who held a seat, party or committee membership on a given date """
+    if as_of:
+        set_as_of_date(as_of.strftime('%Y-%m-%d'))
+
+    if seat:
+        chamber, district = seat.split('/', 1)
+        key = ('seat', chamber, district)
+    elif party:
+        key = ('party', party)
+    elif committee:
+        key = ('committee', committee)
+    else:
+        raise click.UsageError('one of --seat, --party or --committee is required')
+
+    snapshot = Snapshot(snapshot_file) if snapshot_file else None
+    index = build_index(abbr, snapshot)
+    if snapshot:
+        snapshot.save()
+    for id, name in index.lookup(key):
+        click.secho(f'{name} {id or ""}')
+
+
+if __name__ == '__main__':
+    role_index()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+import os
+import glob
+import pickle
+import click
+from utils import get_data_dir, get_all_abbrs, load_yaml
+
+DIRECTORIES = ('people', 'retired', 'organizations')
+# snapshots read by this process, see Snapshot.__reduce__
+_shared = {}
+
+
+class Snapshot:
+    """
+    every parsed YAML file under test/ in a single pickle file
+
+    each entry records the file's mtime & size so that stale entries are re-parsed on
+    access, objects are stored individually pickled so every load() returns a fresh copy
+    that callers are free to modify
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.files = {}
+        self.dirty = False
+        self.parsed = 0
+        self.reused = 0
+
+        try:
+            with open(filename, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('format') == self.FORMAT_VERSION:
+                self.files = data['files']
+        except FileNotFoundError:
+            pass
+        except (EOFError, pickle.UnpicklingError, AttributeError, ValueError) as e:
+            # e.g. an interrupted write by an older version, start again from scratch
+            click.secho(f'{filename}: ignoring unreadable snapshot ({e!r})', fg='yellow',
+                        err=True)
+
+    def __reduce__(self):
+        # ship only the filename to worker processes, each reads the saved snapshot once
+        return (open_shared, (self.filename,))
+
+    @staticmethod
+    def get_key(filename):
+        # the data root is looked up each time, scripts & tests may repoint it
+        return os.path.relpath(os.path.realpath(filename), os.path.realpath(get_data_dir('')))
+
+    def load(self, filename):
+        """ the parsed contents of filename, only parsing it if it changed since the snapshot """
+        key = self.get_key(filename)
+        stat = os.stat(filename)
+        entry = self.files.get(key)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            self.reused += 1
+            return pickle.loads(entry[2])
+
+        with open(filename) as f:
+            obj = load_yaml(f)
+        self.files[key] = (stat.st_mtime_ns, stat.st_size,
+                           pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+        self.dirty = True
+        self.parsed += 1
+        return obj
+
+    def refresh(self, abbrs):
+        """ bring the snapshot up to date for the given jurisdictions """
+        for abbr in abbrs:
+            seen = set()
+            for directory in DIRECTORIES:
+                for filename in glob.glob(os.path.join(get_data_dir(abbr), directory, '*.yml')):
+                    self.load(filename)
+                    seen.add(self.get_key(filename))
+
+            prefix = abbr + os.sep
+            for key in [key for key in self.files if key.startswith(prefix)]:
+                if key not in seen:
+                    del self.files[key]
+                    self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            pickle.dump({'format': self.FORMAT_VERSION, 'files': self.files}, f,
+                        pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filename, self.filename)
+        self.dirty = False
+
+
+def open_shared(filename):
+    """
+    the Snapshot saved at filename, read once per process & reused by every task it runs
+    until the file is saved again
+    """
+    stat = os.stat(filename)
+    version = (stat.st_mtime_ns, stat.st_size)
+    if filename not in _shared or _shared[filename][0] != version:
+        _shared[filename] = (version, Snapshot(filename))
+    return _shared[filename][1]
+
+
+def open_refreshed(filename, abbrs):
+    """
+    the Snapshot at filename brought up to date for abbrs & saved, done once up front so
+    that worker processes can share it read-only
+    """
+    snap = Snapshot(filename)
+    snap.refresh(abbrs)
+    snap.save()
+    return snap
+
+
+def load_file(filename, snapshot=None):
+    """ load a YAML data file, going through the snapshot if there is one """
+    if snapshot:
+        return snapshot.load(filename)
+    with open(filename) as f:
+        return load_yaml(f)
+
+
+@click.command()
+@click.argument('abbrs', nargs=-1)
+@click.option('-o', '--output', required=True, type=click.Path(dir_okay=False),
+              help='snapshot file to create or update')
+def snapshot(abbrs, output):
+    """ compile test/<abbr>/ YAML into a snapshot for the --snapshot option of other scripts """
+    if not abbrs:
+        abbrs = get_all_abbrs()
+
+    snap = open_refreshed(output, abbrs)
+    click.secho(f'{output}: parsed {snap.parsed} files, {snap.reused} unchanged', fg='green')
+
+
+if __name__ == '__main__':
+    snapshot()
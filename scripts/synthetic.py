@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+import os
+import uuid
+import random
+import click
+import yaml
+from collections import OrderedDict
+from utils import get_jurisdiction_id, dump_obj
+
+FIRST_NAMES = ('Anne', 'Bob', 'Carla', 'David', 'Elena', 'Frank', 'Grace', 'Hector',
+               'Irene', 'James', 'Keisha', 'Luis', 'Maria', 'Nathan', 'Olivia', 'Paul')
+LAST_NAMES = ('Smith', 'Johnson', 'Garcia', 'Brown', 'Lee', 'Nguyen', 'Patel', 'Clark',
+              'Lopez', 'Young', 'Hill', 'Scott', 'Adams', 'Baker', 'Reyes', 'Turner')
+PARTIES = ('Democratic', 'Republican', 'Republican', 'Democratic', 'Independent')
+COMMITTEE_TOPICS = ('Finance', 'Education', 'Health', 'Judiciary', 'Transportation',
+                    'Agriculture', 'Commerce', 'Rules', 'Ethics', 'Appropriations')
+
+
+def get_seats(index, count, chamber):
+    """
+    a settings.yml style seat map for count seats, cycling through the three styles
+    that settings.yml uses: a number of seats, a list of district names & a dict of
+    multi-member districts
+    """
+    style = index % 3
+    if style == 0 or count < 2:
+        return count
+    elif style == 1:
+        return [f'{chamber[0].upper()}{n}' for n in range(1, count + 1)]
+    else:
+        # two members per district, plus a single-member district if count is odd
+        seats = {str(n): 2 for n in range(1, count // 2 + 1)}
+        if count % 2:
+            seats[str(count // 2 + 1)] = 1
+        return seats
+
+
+def expand_seats(seats):
+    """ one district name per member """
+    if isinstance(seats, int):
+        return [str(n) for n in range(1, seats + 1)]
+    elif isinstance(seats, list):
+        return list(seats)
+    return [district for district, count in seats.items() for _ in range(count)]
+
+
+class Generator:
+    """ produces people & committees with the same shapes as the files under test/ """
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+
+    def ocd_id(self, type):
+        return 'ocd-{}/{}'.format(type, uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def name(self):
+        return '{} {}'.format(self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES))
+
+    def person(self, abbr, chamber, district, retired=False):
+        name = self.name()
+        slug = name.replace(' ', '-').lower()
+        url = f'https://legislature.example.gov/{abbr}/{chamber}/{slug}'
+        role = OrderedDict(district=district, jurisdiction=get_jurisdiction_id(abbr),
+                           type=chamber)
+        if retired:
+            role['end_date'] = '2016-12-31'
+        return OrderedDict(
+            id=self.ocd_id('person'),
+            name=name,
+            party=[OrderedDict(name=self.rng.choice(PARTIES))],
+            roles=[role],
+            links=[OrderedDict(url=url)],
+            contact_details=[
+                OrderedDict(address=f'Room {self.rng.randint(100, 999)};1 Capitol Sq',
+                            email=f'{slug}@legislature.example.gov',
+                            note='Capitol Office',
+                            voice=f'555-{self.rng.randint(200, 999)}-'
+                                  f'{self.rng.randint(1000, 9999)}'),
+                OrderedDict(note='District Office',
+                            voice=f'555-{self.rng.randint(200, 999)}-'
+                                  f'{self.rng.randint(1000, 9999)}'),
+            ],
+            sources=[OrderedDict(url=url)],
+            image=f'https://legislature.example.gov/{abbr}/photos/{slug}.jpg',
+        )
+
+    def committee(self, abbr, chamber, members):
+        name = '{} {}'.format(self.rng.choice(COMMITTEE_TOPICS), self.rng.randint(1, 99))
+        memberships = []
+        for n, person in enumerate(members):
+            memberships.append(OrderedDict(id=person['id'], name=person['name'],
+                                           role='Chair' if n == 0 else 'Member'))
+        return OrderedDict(
+            id=self.ocd_id('organization'),
+            name=name,
+            jurisdiction=get_jurisdiction_id(abbr),
+            parent=chamber,
+            classification='committee',
+            links=[],
+            sources=[OrderedDict(url=f'https://legislature.example.gov/{abbr}/committees')],
+            memberships=memberships,
+        )
+
+    def jurisdiction(self, output_dir, abbr, index, people, retired, committees):
+        """ write a jurisdiction's files & return its settings.yml entry """
+        upper_count = max(people // 3, 1)
+        settings = {'upper_seats': get_seats(index, upper_count, 'upper'),
+                    'lower_seats': get_seats(index, people - upper_count, 'lower')}
+
+        for directory in ('people', 'retired', 'organizations'):
+            os.makedirs(os.path.join(output_dir, abbr, directory), exist_ok=True)
+
+        by_chamber = {'upper': [], 'lower': []}
+        for chamber in by_chamber:
+            for district in expand_seats(settings[chamber + '_seats']):
+                person = self.person(abbr, chamber, district)
+                by_chamber[chamber].append(person)
+                dump_obj(person, output_dir=os.path.join(output_dir, abbr, 'people'))
+
+        for n in range(retired):
+            chamber = self.rng.choice(('upper', 'lower'))
+            district = self.rng.choice(expand_seats(settings[chamber + '_seats']))
+            person = self.person(abbr, chamber, district, retired=True)
+            dump_obj(person, output_dir=os.path.join(output_dir, abbr, 'retired'))
+
+        for n in range(committees):
+            chamber = self.rng.choice(('upper', 'lower'))
+            pool = by_chamber[chamber]
+            members = self.rng.sample(pool, min(len(pool), self.rng.randint(5, 15)))
+            dump_obj(self.committee(abbr, chamber, members),
+                     output_dir=os.path.join(output_dir, abbr, 'organizations'))
+
+        return settings
+
+
+def generate_corpus(output_dir, states, people, retired, committees, seed=0):
+    """ write states synthetic jurisdictions & a matching settings.yml to output_dir """
+    generator = Generator(seed)
+    settings = {}
+    for index in range(states):
+        abbr = f'x{index:02d}'
+        settings[abbr] = generator.jurisdiction(output_dir, abbr, index, people, retired,
+                                                committees)
+    with open(os.path.join(output_dir, 'settings.yml'), 'w') as f:
+        yaml.safe_dump(settings, f, default_flow_style=None)
+    return settings
+
+
+@click.command()
+@click.argument('output_dir')
+@click.option('--states', default=50)
+@click.option('--people', default=150, help='active people per state')
+@click.option('--retired', default=10, help='retired people per state')
+@click.option('--committees', default=40, help='committees per state')
+@click.option('--seed', default=0)
+def synthetic(output_dir, states, people, retired, committees, seed):
+    """ generate a schema-valid synthetic corpus for benchmarking """
+    generate_corpus(output_dir, states, people, retired, committees, seed)
+    click.secho(f'wrote {states} jurisdictions to {output_dir}', fg='green')
+
+
+if __name__ == '__main__':
+    synthetic()
@@ -0,0 +1,81 @@
+import pickle
+from db_profile import QueryProfiler, get_query_shape, phase, profile_file, untracked_query
+
+
+def fake_execute(sql, params, many, context):
+    return sql
+
+
+def test_get_query_shape():
+    assert (get_query_shape('SELECT "person"."id", "person"."name" FROM person '
+                            'WHERE id IN (%s, %s, %s)') ==
+            'SELECT ... FROM person WHERE id IN (...)')
+    assert (get_query_shape('SELECT DISTINCT "person"."id" FROM person') ==
+            'SELECT DISTINCT ... FROM person')
+    assert (get_query_shape('INSERT INTO link (url, note) VALUES (%s, %s), (%s, %s)') ==
+            'INSERT INTO link (url, note) VALUES (...), ...')
+    assert get_query_shape('SELECT 1') == 'SELECT 1'
+
+
+def test_profiler_tallies():
+    profiler = QueryProfiler()
+    # nothing is recorded unless a profiler is active
+    with phase('person load'):
+        pass
+    assert profiler.phases == {}
+
+    with profiler.activate():
+        with phase('existing-id scan'):
+            profiler(fake_execute, 'SELECT id FROM person WHERE id IN (%s)', [1], False, {})
+        with phase('person load'):
+            with profile_file('a.yml'):
+                assert profiler(fake_execute, 'SELECT 1', [], False, {}) == 'SELECT 1'
+                profiler(fake_execute, 'SELECT id FROM person WHERE id IN (%s, %s)', [1, 2],
+                         False, {})
+            with profile_file('b.yml'):
+                profiler(fake_execute, 'SELECT 1', [], False, {})
+        profiler(fake_execute, 'SELECT 2', [], False, {})
+
+    assert profiler.total[0] == 5
+    assert profiler.phases['existing-id scan'][0] == 1
+    assert profiler.phases['person load'][0] == 3
+    assert profiler.files['a.yml'][0] == 2
+    assert profiler.files['b.yml'][0] == 1
+    assert profiler.shapes['SELECT ... FROM person WHERE id IN (...)'][0] == 2
+    assert profiler.current_phase is profiler.current_file is None
+
+    report = profiler.to_dict()
+    assert report['total']['queries'] == 5
+    assert report['shapes'][0] == {'sql': 'SELECT ... FROM person WHERE id IN (...)',
+                                   'queries': 2,
+                                   'query_seconds': report['shapes'][0]['query_seconds']}
+
+
+def test_profiler_merge():
+    worker = QueryProfiler()
+    with worker.activate(), phase('purge'):
+        worker(fake_execute, 'DELETE FROM person', [], False, {})
+    # profilers come back from worker processes pickled
+    worker = pickle.loads(pickle.dumps(worker))
+
+    profiler = QueryProfiler()
+    profiler.merge(worker, 'nc')
+    profiler.merge(worker, 'ak')
+    assert profiler.total[0] == 2
+    assert profiler.phases['purge'][0] == 2
+    assert profiler.jurisdictions['nc'][0] == profiler.jurisdictions['ak'][0] == 1
+
+
+def test_untracked_query():
+    profiler = QueryProfiler()
+    # nothing is recorded unless a profiler is active
+    with untracked_query('COPY staging (id) FROM STDIN'):
+        pass
+    assert profiler.total[0] == 0
+
+    with profiler.activate(), phase('cold load'):
+        with untracked_query('COPY staging (id) FROM STDIN'):
+            pass
+    assert profiler.total[0] == 1
+    assert profiler.phases['cold load'][0] == 1
+    assert profiler.shapes['COPY staging (id) FROM STDIN'][0] == 1
@@ -1,8 +1,16 @@
+import os
+import io
 import pytest
+import pickle
+from utils import load_yaml
+from snapshot import Snapshot
+from lint_cache import LintCache
 from lint_yaml import (is_url, is_social, is_fuzzy_date, is_phone,
                        is_ocd_person, is_legacy_openstates,
-                       validate_obj, PERSON_FIELDS, validate_roles,
-                       get_expected_districts, compare_districts, Validator) # noqa
+                       validate_obj, PERSON_FIELDS, validate_roles, compile_schema,
+                       get_expected_districts, compare_districts, Validator, PersonRecord,
+                       get_changed_paths, group_changed_paths, get_affected_filenames,
+                       validate_dir) # noqa
 
 
 def test_is_url():
@@ -144,6 +152,33 @@ def test_validate_extra_keys_not_present():
     assert 'extra key: links.0.bad' in errs
 
 
+def test_compile_schema_nested_prefixes():
+    check = compile_schema(PERSON_FIELDS)
+    example = {
+        'id': EXAMPLE_OCD_PERSON_ID,
+        'name': 'Anne A',
+        'ids': {'junk': 'x'},
+        'roles': [
+            {'type': 'upper', 'district': '4',
+             'jurisdiction': 'ocd-jurisdiction/country:us/state:nc',
+             'contact_details': [{'voice': '919-555-1234'}]},
+        ]
+    }
+    errors = []
+    check(example, 'person.', errors)
+    assert errors == [
+        'extra key: ids.junk',
+        'roles.0: contact_details.0.note missing',
+    ]
+    # compiled output matches the interpreted entry point
+    assert validate_obj(example, PERSON_FIELDS, ['person']) == errors
+
+
+def test_compile_schema_invalid():
+    with pytest.raises(Exception):
+        compile_schema({'name': 'not-a-validator'})
+
+
 @pytest.mark.parametrize("person,expected", [
     ({"party": [{"name": "Democratic"}]}, []),
     ({"party": [{"name": "Democratic"}, {"name": "Working Families"}]}, []),
@@ -197,8 +232,8 @@ def test_compare_districts(expected, actual, errors, warnings):
 
 def test_compare_districts_overfill():
     expected = {"A": 1}
-    actual = {'A': [{'id': 'ocd-person/1', 'name': 'Anne'},
-                    {'id': 'ocd-person/2', 'name': 'Bob'}]}
+    actual = {'A': [PersonRecord('ocd-person/1', 'Anne', 'Anne-1.yml', 'upper', 'A'),
+                    PersonRecord('ocd-person/2', 'Bob', 'Bob-2.yml', 'upper', 'A')]}
     e, w = compare_districts({"upper": expected}, {"upper": actual})
     assert len(e) == 1
     assert len(w) == 0
@@ -298,3 +333,141 @@ def test_validate_org_memberships():
     v.validate_org(org, 'fake-org')
     assert len(v.warnings['fake-org']) == 1
     assert v.warnings['fake-org']
+
+
+def test_validator_pickles():
+    # --jobs sends validators back from worker processes
+    settings = {'us': {'upper_seats': 100, 'lower_seats': 435}}
+    person = {'id': EXAMPLE_OCD_PERSON_ID,
+              'name': 'Jane Smith',
+              'roles': [{'type': 'upper', 'district': '1',
+                         'jurisdiction': 'ocd-jurisdiction/country:us'}],
+              'party': [{'name': 'Democratic'}],
+              }
+    v = Validator(settings, 'us')
+    v.validate_person(person, 'fake-person')
+
+    v2 = pickle.loads(pickle.dumps(v))
+    assert v2.errors == v.errors
+    assert v2.parties == {'Democratic': 1}
+    assert len(v2.active_legislators['upper']['1']) == 1
+    assert v2.active_legislators['upper']['1'][0].filename == 'fake-person'
+
+
+def test_validator_replay_facts():
+    # cached (errors, facts) must leave a Validator in the same state as validating again
+    settings = {'us': {'upper_seats': 100, 'lower_seats': 435}}
+    person = {'id': EXAMPLE_OCD_PERSON_ID,
+              'name': 'Jane Smith',
+              'roles': [{'type': 'upper', 'district': '1',
+                         'jurisdiction': 'ocd-jurisdiction/country:us'}],
+              'party': [{'name': 'Democratic'}],
+              'ids': {'twitter': 'jane'},
+              }
+    org = {'id': EXAMPLE_OCD_ORG_ID,
+           'name': 'Finance Committee',
+           'jurisdiction': 'ocd-jurisdiction/country:us',
+           'parent': 'lower',
+           'classification': 'committee',
+           'memberships': [{'id': EXAMPLE_OCD_PERSON_ID, 'name': 'Smith'},
+                           {'name': 'No Id', 'role': 'chair'}],
+           }
+
+    v = Validator(settings, 'us')
+    person_result = v.validate_person(person, 'fake-person')
+    org_result = v.validate_org(org, 'fake-org')
+
+    replayed = Validator(settings, 'us')
+    replayed.add_person(*reversed(person_result), 'fake-person')
+    replayed.add_org(*reversed(org_result), 'fake-org')
+
+    for attr in ('errors', 'warnings', 'person_mapping', 'parties', 'id_counts',
+                 'role_types', 'parent_types', 'missing_person_id', 'person_count'):
+        assert getattr(v, attr) == getattr(replayed, attr)
+    assert len(replayed.warnings['fake-org']) == 1
+
+
+def test_get_changed_paths_includes_untracked(monkeypatch):
+    outputs = {'diff': 'test/nc/people/changed.yml\n', 'ls-files': 'test/nc/people/new.yml\n'}
+    monkeypatch.setattr('subprocess.check_output', lambda cmd, **kwargs: outputs[cmd[1]])
+    assert get_changed_paths('HEAD') == ['test/nc/people/changed.yml', 'test/nc/people/new.yml']
+
+
+def test_group_changed_paths():
+    changed = group_changed_paths([
+        'README.md',
+        'scripts/lint_yaml.py',
+        'test/nc/people/Jane-Smith-12345678-0000-1111-2222-1234567890ab.yml',
+        'test/nc/retired/Bob-Smith-12345678-0000-1111-2222-1234567890ac.yml',
+        'test/ak/organizations/Finance-00001111-2222-3333-aaaa-444455556666.yml',
+    ])
+    assert changed == {
+        'nc': {('people', 'Jane-Smith-12345678-0000-1111-2222-1234567890ab.yml'),
+               ('retired', 'Bob-Smith-12345678-0000-1111-2222-1234567890ac.yml')},
+        'ak': {('organizations', 'Finance-00001111-2222-3333-aaaa-444455556666.yml')},
+    }
+    # seat counts may have changed everywhere
+    assert group_changed_paths(['settings.yml', 'test/nc/people/x.yml']) is None
+
+
+def test_get_affected_filenames():
+    person_filename = 'Adline-Clarke-4cb1aeb5-d822-4f2c-a7e6-ae2a132acf17.yml'
+    org_filename = 'Finance-and-Taxation-Education-6acc7e7d-1c93-4d95-9ad2-cbc9a367aac0.yml'
+    affected = get_affected_filenames('al', {('people', person_filename),
+                                             ('organizations', org_filename)})
+    assert person_filename in affected
+    assert org_filename in affected
+    # committees that this person is a member of
+    assert 'Mobile-County-Legislation-f6eb9877-616a-415d-8949-3304ea5ba7a7.yml' in affected
+    assert len(affected) == 7
+
+
+def test_person_record_is_compact():
+    record = PersonRecord(EXAMPLE_OCD_PERSON_ID, 'Jane Smith', 'Jane-Smith.yml', 'upper', '1')
+    assert not hasattr(record, '__dict__')
+    # repeated values share a single string
+    other = PersonRecord(EXAMPLE_OCD_ORG_ID, 'Bob', 'Bob.yml', ''.join(['up', 'per']), '1')
+    assert other.chamber is record.chamber
+
+
+def test_validate_dir_snapshot_skips_unchanged_files(tmpdir, monkeypatch):
+    with open(os.path.join(os.path.dirname(__file__), '../../settings.yml')) as f:
+        settings = load_yaml(f)
+    snap = Snapshot(str(tmpdir.join('snapshot.pkl')))
+    snap.refresh(['ak'])
+    expected = validate_dir('ak', settings, snapshot=snap).errors
+
+    opened = []
+
+    def fake_open(filename, *args, **kwargs):
+        opened.append(filename)
+        return real_open(filename, *args, **kwargs)
+    real_open = io.open
+    monkeypatch.setattr('builtins.open', fake_open)
+
+    # files that match the snapshot's mtime & size are never read
+    assert validate_dir('ak', settings, snapshot=snap).errors == expected
+    assert not [filename for filename in opened if str(filename).endswith('.yml')]
+
+
+def test_validate_dir_changed_since_keeps_cache(tmpdir, monkeypatch):
+    with open(os.path.join(os.path.dirname(__file__), '../../settings.yml')) as f:
+        settings = load_yaml(f)
+    cache_dir = str(tmpdir)
+    validate_dir('al', settings, cache_dir)
+
+    hits = []
+    real_save = LintCache.save
+
+    def save(cache):
+        hits.append((cache.hits, cache.misses))
+        real_save(cache)
+    monkeypatch.setattr(LintCache, 'save', save)
+
+    # an incremental run followed by a full run, which should still be entirely cached
+    person_filename = 'Adline-Clarke-4cb1aeb5-d822-4f2c-a7e6-ae2a132acf17.yml'
+    validate_dir('al', settings, cache_dir, selected={person_filename})
+    validate_dir('al', settings, cache_dir)
+    full_hits, full_misses = hits[-1]
+    assert full_hits > 0
+    assert full_misses == 0
@@ -0,0 +1,85 @@
+import pytest
+from lint_cache import LintCache, get_end_dates, get_valid_window
+
+
+def test_get_end_dates():
+    person = {'roles': [{'end_date': '2010'}, {'start_date': '2010'}],
+              'party': [{'name': 'Democratic', 'end_date': '2020-01-01'}]}
+    assert get_end_dates(person) == ['2010', '2020-01-01']
+    assert get_end_dates({'memberships': [{'name': 'A'}]}) == []
+
+
+@pytest.mark.parametrize("end_dates,window", [
+    ([], (None, None)),
+    (['2010'], ('2010', None)),
+    (['2030-01-01'], (None, '2030-01-01')),
+    (['2010', '2012', '2030', '2040'], ('2012', '2030')),
+])
+def test_get_valid_window(end_dates, window):
+    assert get_valid_window(end_dates, '2018-10-01') == window
+
+
+def test_cache_roundtrip(tmpdir):
+    person = {'roles': [{'end_date': '2020-01-01'}]}
+    content = b'name: Jane Smith'
+
+    cache = LintCache(str(tmpdir), 'nc', 'v1', today='2018-10-01')
+    assert cache.get('person', content) is None
+    cache.put('person', content, person, ['an error'], {'id': 'abc'})
+    cache.save()
+
+    cache = LintCache(str(tmpdir), 'nc', 'v1', today='2019-01-01')
+    assert cache.get('person', content) == (['an error'], {'id': 'abc'})
+    # content is keyed by kind as well
+    assert cache.get('retired', content) is None
+    assert cache.get('person', b'name: Jane') is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_expires_on_end_date(tmpdir):
+    person = {'roles': [{'end_date': '2020-01-01'}]}
+    content = b'name: Jane Smith'
+
+    cache = LintCache(str(tmpdir), 'nc', 'v1', today='2018-10-01')
+    cache.put('person', content, person, [], {})
+    cache.save()
+
+    # role would no longer be active
+    cache = LintCache(str(tmpdir), 'nc', 'v1', today='2020-01-01')
+    assert cache.get('person', content) is None
+
+
+def test_cache_invalidated_by_source_version(tmpdir):
+    cache = LintCache(str(tmpdir), 'nc', 'v1', today='2018-10-01')
+    cache.put('person', b'', {}, [], {})
+    cache.save()
+
+    assert LintCache(str(tmpdir), 'nc', 'v1').entries
+    assert LintCache(str(tmpdir), 'nc', 'v2').entries == {}
+
+
+def test_cache_drops_unused_entries(tmpdir):
+    cache = LintCache(str(tmpdir), 'nc', 'v1', today='2018-10-01')
+    cache.put('person', b'old', {}, [], {})
+    cache.save()
+
+    cache = LintCache(str(tmpdir), 'nc', 'v1', today='2018-10-01')
+    cache.put('person', b'new', {}, [], {})
+    cache.save()
+
+    cache = LintCache(str(tmpdir), 'nc', 'v1', today='2018-10-01')
+    assert cache.get('person', b'old') is None
+    assert cache.get('person', b'new') is not None
+
+
+def test_cache_keeps_skipped_entries(tmpdir):
+    cache = LintCache(str(tmpdir), 'nc', 'v1', today='2018-10-01')
+    cache.put('organization', b'skipped', {}, [], {})
+    cache.save()
+
+    cache = LintCache(str(tmpdir), 'nc', 'v1', today='2018-10-01')
+    cache.keep('organization', b'skipped')
+    cache.save()
+
+    cache = LintCache(str(tmpdir), 'nc', 'v1', today='2018-10-01')
+    assert cache.get('organization', b'skipped') is not None
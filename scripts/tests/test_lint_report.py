@@ -0,0 +1,77 @@
+import io
+import json
+from lint_report import JsonLinesReporter, SarifReporter, BufferedReporter
+from lint_yaml import Validator
+
+
+def test_jsonl_reporter():
+    out = io.StringIO()
+    reporter = JsonLinesReporter(out)
+    reporter.report('nc', 'test/nc/people/a.yml', ['bad'], ['iffy'])
+    reporter.report('nc', 'test/nc/people/b.yml', [], [])
+    reporter.report('nc', None, ['missing seat'], [])
+    reporter.close()
+
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert lines == [
+        {'jurisdiction': 'nc', 'path': 'test/nc/people/a.yml', 'level': 'error',
+         'message': 'bad'},
+        {'jurisdiction': 'nc', 'path': 'test/nc/people/a.yml', 'level': 'warning',
+         'message': 'iffy'},
+        {'jurisdiction': 'nc', 'path': None, 'level': 'error', 'message': 'missing seat'},
+    ]
+
+
+def test_sarif_reporter():
+    out = io.StringIO()
+    reporter = SarifReporter(out)
+    reporter.report('nc', 'test/nc/people/a.yml', ['bad'], ['iffy'])
+    reporter.report('nc', None, [], ['missing seat'])
+    reporter.close()
+
+    sarif = json.loads(out.getvalue())
+    assert sarif['version'] == '2.1.0'
+    results = sarif['runs'][0]['results']
+    assert [r['level'] for r in results] == ['error', 'warning', 'warning']
+    assert results[0]['locations'][0]['physicalLocation']['artifactLocation']['uri'] == \
+        'test/nc/people/a.yml'
+    assert 'locations' not in results[2]
+
+
+def test_sarif_reporter_empty():
+    out = io.StringIO()
+    reporter = SarifReporter(out)
+    reporter.close()
+    assert json.loads(out.getvalue())['runs'][0]['results'] == []
+
+
+def test_buffered_reporter_replay():
+    buffered = BufferedReporter()
+    buffered.report('nc', 'a.yml', ['bad'], [])
+    buffered.report('nc', 'b.yml', [], [])
+
+    out = io.StringIO()
+    buffered.replay(JsonLinesReporter(out))
+    assert len(out.getvalue().splitlines()) == 1
+
+
+def test_validator_streams_findings():
+    out = io.StringIO()
+    settings = {'us': {'upper_seats': 1, 'lower_seats': 1}}
+    v = Validator(settings, 'us', JsonLinesReporter(out))
+    v.validate_person({'id': 'bad-id', 'name': 'Jane Smith', 'roles': [], 'party': []},
+                      'jane.yml')
+    v.flush_file('jane.yml', 'test/us/people/jane.yml')
+
+    # findings are written immediately & not kept around
+    findings = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert {f['path'] for f in findings} == {'test/us/people/jane.yml'}
+    assert len(findings) == 3
+    assert 'jane.yml' not in v.errors
+    # but the person is still known for the cross-file checks
+    assert v.person_mapping == {'bad-id': 'Jane Smith'}
+
+    v.report_districts(v.reporter)
+    last = json.loads(out.getvalue().splitlines()[-1])
+    assert last['path'] is None
+    assert last['message'].startswith('expected districts')
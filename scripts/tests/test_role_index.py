@@ -0,0 +1,104 @@
+import random
+import pytest
+from role_index import RoleIndex, build_index, interval_contains
+from utils import set_as_of_date
+from snapshot import Snapshot
+
+
+def make_index():
+    index = RoleIndex()
+    index.add_person({'id': 'a', 'name': 'Anne',
+                      'roles': [{'type': 'lower', 'district': '1', 'end_date': '2012-01-01'},
+                                {'type': 'upper', 'district': '3', 'start_date': '2012-01-01'}],
+                      'party': [{'name': 'Democratic'}]})
+    index.add_person({'id': 'b', 'name': 'Bob',
+                      'roles': [{'type': 'lower', 'district': 1, 'start_date': '2012-01-01',
+                                 'end_date': '2014-01-01'}],
+                      'party': [{'name': 'Republican', 'end_date': '2013'},
+                                {'name': 'Democratic', 'start_date': '2013'}]})
+    index.add_org({'id': 'ocd-organization/1',
+                   'memberships': [{'id': 'a', 'name': 'Anne', 'end_date': '2011'},
+                                   {'name': 'Carl'}]})
+    return index
+
+
+@pytest.mark.parametrize("start,end,date,expected", [
+    (None, None, '2018-01-01', True),
+    ('2018-01-01', None, '2018-01-01', True),
+    ('2018-01-02', None, '2018-01-01', False),
+    (None, '2018-01-01', '2018-01-01', False),
+    (None, '2018', '2017-12-31', True),
+])
+def test_interval_contains(start, end, date, expected):
+    assert interval_contains(start, end, date) == expected
+
+
+@pytest.mark.parametrize("date,lower_1,upper_3", [
+    ('2000-01-01', ('a',), ()),
+    ('2011-12-31', ('a',), ()),
+    ('2012-01-01', ('b',), ('a',)),
+    ('2013-06-01', ('b',), ('a',)),
+    ('2014-01-01', (), ('a',)),
+])
+def test_seat_lookup(date, lower_1, upper_3):
+    index = make_index()
+    assert tuple(id for id, name in index.seat('lower', '1', date)) == lower_1
+    assert tuple(id for id, name in index.seat('upper', 3, date)) == upper_3
+
+
+def test_party_and_committee_lookup():
+    index = make_index()
+    assert index.party('Democratic', '2012-06-01') == (('a', 'Anne'),)
+    assert index.party('Democratic', '2013-06-01') == (('a', 'Anne'), ('b', 'Bob'))
+    assert index.party('Republican', '2013-06-01') == ()
+    assert index.committee('ocd-organization/1', '2010') == (('a', 'Anne'), (None, 'Carl'))
+    assert index.committee('ocd-organization/1', '2018') == ((None, 'Carl'),)
+    assert index.party('Green', '2018') == ()
+
+
+def test_lookup_defaults_to_as_of_date():
+    index = make_index()
+    try:
+        set_as_of_date('2011-06-01')
+        assert index.seat('lower', '1') == (('a', 'Anne'),)
+    finally:
+        set_as_of_date(None)
+    assert index.seat('lower', '1') == ()
+
+
+def test_build_index_corpus():
+    index = build_index('ar')
+    assert len(index.seat('lower', '1', '2018-10-01')) == 1
+    # retired members are still found on dates they served
+    assert 'Jake Files' in [name for id, name in index.seat('upper', '8', '2018-01-29')]
+    assert 'Jake Files' not in [name for id, name in index.seat('upper', '8', '2018-01-30')]
+
+
+def test_build_index_snapshot(tmpdir):
+    snap = Snapshot(str(tmpdir.join('snapshot.pkl')))
+    index = build_index('ar', snap)
+    assert snap.parsed > 0
+    assert index.seat('lower', '1', '2018-10-01') == build_index('ar').seat('lower', '1',
+                                                                            '2018-10-01')
+
+
+def test_lookup_matches_brute_force():
+    rng = random.Random(0)
+    years = [None] + [str(year) for year in range(2000, 2020)]
+    index = RoleIndex()
+    intervals = []
+    for n in range(300):
+        start_date, end_date = rng.choice(years), rng.choice(years)
+        intervals.append((start_date, end_date, (str(n), f'Person {n}')))
+        index.add_interval(('party', 'Democratic'), intervals[-1][2],
+                           {'start_date': start_date, 'end_date': end_date})
+
+    for year in range(1999, 2021):
+        date = f'{year}-06-01'
+        assert index.party('Democratic', date) == tuple(
+            holder for start_date, end_date, holder in intervals
+            if interval_contains(start_date, end_date, date))
+        # breakpoints themselves
+        assert index.party('Democratic', str(year)) == tuple(
+            holder for start_date, end_date, holder in intervals
+            if interval_contains(start_date, end_date, str(year)))
@@ -0,0 +1,116 @@
+import os
+import pickle
+from snapshot import Snapshot, load_file, open_refreshed
+
+
+def test_snapshot_reuses_unchanged_files(tmpdir):
+    data_file = tmpdir.join('person.yml')
+    data_file.write('id: 123\nname: Jane Smith\n')
+    snapshot_file = str(tmpdir.join('snapshot.pkl'))
+
+    snap = Snapshot(snapshot_file)
+    assert snap.load(str(data_file)) == {'id': 123, 'name': 'Jane Smith'}
+    assert (snap.parsed, snap.reused) == (1, 0)
+    snap.save()
+
+    snap = Snapshot(snapshot_file)
+    assert snap.load(str(data_file)) == {'id': 123, 'name': 'Jane Smith'}
+    assert (snap.parsed, snap.reused) == (0, 1)
+
+
+def test_snapshot_reparses_changed_files(tmpdir):
+    data_file = tmpdir.join('person.yml')
+    data_file.write('id: 123\nname: Jane Smith\n')
+    snapshot_file = str(tmpdir.join('snapshot.pkl'))
+
+    snap = Snapshot(snapshot_file)
+    snap.load(str(data_file))
+    snap.save()
+
+    data_file.write('id: 123\nname: Jane Q. Smith\n')
+    # make sure the change is visible even on filesystems with coarse mtimes
+    stat = os.stat(str(data_file))
+    os.utime(str(data_file), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    snap = Snapshot(snapshot_file)
+    assert snap.load(str(data_file))['name'] == 'Jane Q. Smith'
+    assert snap.parsed == 1
+
+
+def test_snapshot_returns_copies(tmpdir):
+    data_file = tmpdir.join('person.yml')
+    data_file.write('id: 123\nroles: []\n')
+    snap = Snapshot(str(tmpdir.join('snapshot.pkl')))
+    snap.load(str(data_file))
+
+    person = snap.load(str(data_file))
+    person['roles'].append({'type': 'upper'})
+    assert snap.load(str(data_file))['roles'] == []
+
+
+def test_snapshot_refresh_corpus(tmpdir):
+    snap = Snapshot(str(tmpdir.join('snapshot.pkl')))
+    snap.refresh(['ak'])
+    assert snap.parsed == len(snap.files) > 0
+    assert all(key.startswith('ak' + os.sep) for key in snap.files)
+
+    # a removed file is dropped on the next refresh
+    snap.files[os.path.join('ak', 'people', 'gone.yml')] = (0, 0, b'')
+    snap.refresh(['ak'])
+    assert os.path.join('ak', 'people', 'gone.yml') not in snap.files
+
+
+def test_snapshot_pickles_by_filename(tmpdir):
+    snap = Snapshot(str(tmpdir.join('snapshot.pkl')))
+    snap.refresh(['ak'])
+    snap.save()
+    copy = pickle.loads(pickle.dumps(snap))
+    assert copy.files.keys() == snap.files.keys()
+
+    # a process reads the file once, not once per task it's sent
+    assert pickle.loads(pickle.dumps(snap)) is copy
+
+    # until it's saved again
+    data_file = tmpdir.join('person.yml')
+    data_file.write('id: 123\n')
+    snap.load(str(data_file))
+    snap.save()
+    updated = pickle.loads(pickle.dumps(snap))
+    assert updated is not copy
+    assert updated.files.keys() == snap.files.keys()
+
+
+def test_load_file_without_snapshot(tmpdir):
+    data_file = tmpdir.join('person.yml')
+    data_file.write('id: 123\n')
+    assert load_file(str(data_file)) == {'id': 123}
+
+
+def test_snapshot_ignores_corrupt_file(tmpdir):
+    data_file = tmpdir.join('person.yml')
+    data_file.write('id: 123\nname: Jane Smith\n')
+    snapshot_file = tmpdir.join('snapshot.pkl')
+
+    snap = Snapshot(str(snapshot_file))
+    snap.load(str(data_file))
+    snap.save()
+    # as if the write had been interrupted
+    snapshot_file.write_binary(snapshot_file.read_binary()[:20])
+
+    snap = Snapshot(str(snapshot_file))
+    assert snap.files == {}
+    assert snap.load(str(data_file))['name'] == 'Jane Smith'
+
+
+def test_snapshot_key_follows_data_root(tmpdir, monkeypatch):
+    monkeypatch.setattr('utils.DATA_ROOT', str(tmpdir))
+    assert Snapshot.get_key(str(tmpdir.join('nc', 'people', 'a.yml'))) == os.path.join(
+        'nc', 'people', 'a.yml')
+
+
+def test_open_refreshed(tmpdir):
+    snapshot_file = str(tmpdir.join('snapshot.pkl'))
+    snap = open_refreshed(snapshot_file, ['ak'])
+    assert snap.parsed > 0
+    # saved, so the next run reuses every file
+    assert open_refreshed(snapshot_file, ['ak']).reused == snap.parsed
@@ -0,0 +1,31 @@
+import pytest
+import utils
+from lint_yaml import validate_dir
+from synthetic import generate_corpus, get_seats, expand_seats
+
+
+@pytest.mark.parametrize("index,count,expected", [
+    (0, 3, 3),
+    (1, 3, ['L1', 'L2', 'L3']),
+    (2, 3, {'1': 2, '2': 1}),
+    (2, 1, 1),
+])
+def test_get_seats(index, count, expected):
+    seats = get_seats(index, count, 'lower')
+    assert seats == expected
+    assert len(expand_seats(seats)) == count
+
+
+def test_generated_corpus_is_valid(tmpdir, monkeypatch):
+    settings = generate_corpus(str(tmpdir), states=3, people=12, retired=2, committees=3)
+    assert sorted(settings) == ['x00', 'x01', 'x02']
+
+    monkeypatch.setattr(utils, 'DATA_ROOT', str(tmpdir))
+    for abbr in settings:
+        validator = validate_dir(abbr, settings)
+        assert validator.person_count == 12
+        assert validator.retired_count == 2
+        assert validator.org_count == 3
+        assert not any(validator.errors.values())
+        assert not any(validator.warnings.values())
+        validator.print_validation_report(0)
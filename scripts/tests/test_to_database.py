@@ -1,7 +1,15 @@
 import pytest
 import yaml
+import utils
+from django.db import connection, transaction
+from db_profile import QueryProfiler
 from opencivicdata.core.models import Person, Organization, Jurisdiction, Division
-from to_database import load_person, load_org
+from to_database import (load_person, load_org, bulk_load_people, bulk_load_orgs,
+                         Resolver, CancelTransaction, load_directory,
+                         get_fingerprint, FINGERPRINT_KEY, import_jurisdiction, cold_load,
+                         plan_directory, parse_files,
+                         import_jurisdiction_chunked, Checkpoint, plan_jurisdiction,
+                         run_jurisdiction_isolated)
 
 def setup():
     d = Division.objects.create(id='ocd-division/country:us/state:nc', name='NC')
@@ -137,6 +145,38 @@ def test_subobject_update():
     assert p.updated_at > updated_at
 
 
+@pytest.mark.django_db
+def test_subobject_update_only_changed_rows():
+    data = yaml.load("""
+    id: abcdefab-0000-1111-2222-1234567890ab
+    name: Jane Smith
+    party:
+        - name: Democratic
+    links:
+        - url: https://example.com/jane
+        - url: https://example.com/jane
+    contact_details:
+        - note: home
+          voice: 333-333-3333
+    """)
+    load_person(data)
+    p = Person.objects.get(pk='abcdefab-0000-1111-2222-1234567890ab')
+    link_ids = set(p.links.values_list('id', flat=True))
+    membership_id = p.memberships.get().id
+    assert len(link_ids) == 2
+
+    # a phone number change only replaces that one row
+    data['contact_details'][0]['voice'] = '444-444-4444'
+    data['links'].pop()
+    created, updated = load_person(data)
+    assert updated is True
+    p = Person.objects.get(pk='abcdefab-0000-1111-2222-1234567890ab')
+    assert p.contact_details.get().value == '444-444-4444'
+    assert p.links.count() == 1
+    assert p.links.get().id in link_ids
+    assert p.memberships.get().id == membership_id
+
+
 @pytest.mark.django_db
 def test_person_identifiers():
     yaml_text = """
@@ -340,3 +380,470 @@ def test_org_person_membership_interaction():
     assert created is False
     assert updated is False
     assert o.memberships.count() == 1
+
+
+@pytest.mark.django_db
+def test_bulk_load_people():
+    records = [yaml.load("""
+    id: abcdefab-0000-1111-2222-1234567890ab
+    name: Jane Smith
+    party:
+        - name: Democratic
+    roles:
+        - type: lower
+          district: 3
+          jurisdiction: ocd-jurisdiction/country:us/state:nc
+    links:
+        - url: https://example.com/jane
+    contact_details:
+        - note: home
+          voice: 333-333-3333
+    """), yaml.load("""
+    id: abcdefab-0000-1111-2222-1234567890ac
+    name: John Smith
+    """)]
+
+    created, updated = bulk_load_people(records)
+    assert created == {'abcdefab-0000-1111-2222-1234567890ab',
+                       'abcdefab-0000-1111-2222-1234567890ac'}
+    p = Person.objects.get(pk='abcdefab-0000-1111-2222-1234567890ab')
+    assert p.links.count() == 1
+    assert p.contact_details.get().value == '333-333-3333'
+    assert p.memberships.count() == 2
+    assert p.memberships.get(post__isnull=False).post.label == '3'
+    updated_at = p.updated_at
+    link_id = p.links.get().id
+
+    # no change means no change
+    created, updated = bulk_load_people(records)
+    assert created == updated == set()
+    assert Person.objects.get(pk='abcdefab-0000-1111-2222-1234567890ab').updated_at == updated_at
+
+    records[0]['links'].append({'url': 'https://example.com/extra'})
+    records[1]['name'] = 'Johnny Smith'
+    created, updated = bulk_load_people(records)
+    assert created == set()
+    assert updated == {'abcdefab-0000-1111-2222-1234567890ab',
+                       'abcdefab-0000-1111-2222-1234567890ac'}
+    p = Person.objects.get(pk='abcdefab-0000-1111-2222-1234567890ab')
+    assert p.updated_at > updated_at
+    assert p.links.count() == 2
+    # the unchanged link is left in place
+    assert p.links.filter(id=link_id).count() == 1
+    assert Person.objects.get(pk='abcdefab-0000-1111-2222-1234567890ac').name == 'Johnny Smith'
+
+
+@pytest.mark.django_db
+def test_bulk_load_orgs():
+    Person.objects.create(id='123', name='Jane Smith')
+    records = [yaml.load("""
+    id: ocd-organization/00000000-1111-2222-3333-444455556666
+    name: Finance
+    parent: lower
+    jurisdiction: ocd-jurisdiction/country:us/state:nc
+    classification: committee
+    memberships:
+        - id: 123
+          name: Jane Smith
+        - name: Noah Idy
+    """)]
+
+    created, updated = bulk_load_orgs(records)
+    assert created == {EXAMPLE_ORG_ID}
+    o = Organization.objects.get(pk=EXAMPLE_ORG_ID)
+    assert o.parent.name == 'House'
+    assert o.memberships.count() == 2
+    assert o.memberships.get(person_id='123').person_name == 'Jane Smith'
+
+    created, updated = bulk_load_orgs(records)
+    assert created == updated == set()
+
+    records[0]['memberships'].pop()
+    created, updated = bulk_load_orgs(records)
+    assert updated == {EXAMPLE_ORG_ID}
+    assert o.memberships.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('bulk', [False, True])
+def test_org_extras_kept(tmpdir, bulk):
+    house = Organization.objects.get(classification='lower')
+    Organization.objects.create(id=EXAMPLE_ORG_ID, name='Finance', classification='committee',
+                                parent=house, jurisdiction=house.jurisdiction,
+                                extras={'room': '544'})
+    org_file = tmpdir.join('Finance.yml')
+    org_file.write(yaml.safe_dump({
+        'id': EXAMPLE_ORG_ID, 'name': 'Finance', 'parent': 'lower',
+        'jurisdiction': 'ocd-jurisdiction/country:us/state:nc', 'classification': 'committee',
+    }))
+    (filename, data, unchanged), = parse_files([str(org_file)])
+
+    # committee files have no extras, so the fingerprint is added to what's there
+    if bulk:
+        bulk_load_orgs([data])
+    else:
+        load_org(data)
+    o = Organization.objects.get(pk=EXAMPLE_ORG_ID)
+    assert o.extras['room'] == '544'
+    assert o.extras[FINGERPRINT_KEY] == data['extras'][FINGERPRINT_KEY]
+
+
+@pytest.mark.django_db
+def test_resolver(django_assert_num_queries):
+    resolver = Resolver()
+    role = {'type': 'lower', 'district': 3,
+            'jurisdiction': 'ocd-jurisdiction/country:us/state:nc'}
+
+    # chambers & posts are loaded once for the jurisdiction, parties once for everything
+    with django_assert_num_queries(3):
+        org, post = resolver.get_post(role)
+        resolver.get_post(dict(role, district=1))
+        resolver.get_party('Democratic')
+        resolver.get_party('Republican')
+    assert org.name == 'House'
+    assert post.label == '3'
+
+    with pytest.raises(CancelTransaction):
+        resolver.get_post(dict(role, district=4))
+    with pytest.raises(Organization.DoesNotExist):
+        resolver.get_party('Green')
+
+    Person.objects.create(id='123', name='Jane Smith')
+    assert resolver.get_person(123, 'ocd-jurisdiction/country:us/state:nc').id == '123'
+    with pytest.raises(CancelTransaction):
+        resolver.get_person('456', 'ocd-jurisdiction/country:us/state:nc')
+
+
+@pytest.mark.django_db
+def test_resolver_chambers():
+    jurisdiction = Jurisdiction.objects.get()
+    role = {'type': 'lower', 'district': 1, 'jurisdiction': jurisdiction.id}
+    # other organizations in the jurisdiction aren't chambers
+    Organization.objects.create(name='Governor', classification='executive',
+                                jurisdiction=jurisdiction)
+    assert Resolver().get_chamber(jurisdiction.id, 'executive') is None
+    assert Resolver().get_post(role)[0].name == 'House'
+
+    # a second lower chamber is an error rather than an arbitrary choice
+    Organization.objects.create(name='Assembly', classification='lower',
+                                jurisdiction=jurisdiction)
+    with pytest.raises(Organization.MultipleObjectsReturned):
+        Resolver().get_post(role)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('bulk', [False, True])
+def test_load_directory_skips_unchanged(tmpdir, bulk):
+    person = {'id': 'abcdefab-0000-1111-2222-1234567890ab', 'name': 'Jane Smith',
+              'roles': [{'type': 'lower', 'district': 1,
+                         'jurisdiction': 'ocd-jurisdiction/country:us/state:nc'}]}
+    filename = str(tmpdir.join('Jane-Smith.yml'))
+    with open(filename, 'w') as f:
+        yaml.safe_dump(person, f)
+
+    load_directory([filename], 'person', 'ocd-jurisdiction/country:us/state:nc', purge=False,
+                   bulk=bulk)
+    p = Person.objects.get(pk=person['id'])
+    assert p.extras[FINGERPRINT_KEY] == get_fingerprint(person)
+    updated_at = p.updated_at
+
+    # the fingerprint matches so nothing is loaded, and nothing went missing either
+    load_directory([filename], 'person', 'ocd-jurisdiction/country:us/state:nc', purge=False,
+                   bulk=bulk)
+    assert Person.objects.get(pk=person['id']).updated_at == updated_at
+
+    person['name'] = 'Jane Doe'
+    with open(filename, 'w') as f:
+        yaml.safe_dump(person, f)
+    load_directory([filename], 'person', 'ocd-jurisdiction/country:us/state:nc', purge=False,
+                   bulk=bulk)
+    p = Person.objects.get(pk=person['id'])
+    assert p.name == 'Jane Doe'
+    assert p.extras[FINGERPRINT_KEY] == get_fingerprint(person)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('safe', [False, True])
+def test_import_jurisdiction(tmpdir, monkeypatch, safe):
+    monkeypatch.setattr(utils, 'DATA_ROOT', str(tmpdir))
+    tmpdir.mkdir('nc').mkdir('people').join('Jane-Smith.yml').write(yaml.safe_dump({
+        'id': 'abcdefab-0000-1111-2222-1234567890ab', 'name': 'Jane Smith',
+        'roles': [{'type': 'lower', 'district': 1,
+                   'jurisdiction': 'ocd-jurisdiction/country:us/state:nc'}]
+    }))
+
+    summary = import_jurisdiction('nc', safe=safe)
+
+    assert summary['status'] == ('rolled back' if safe else 'committed')
+    assert summary['person'] == {'created': 1, 'updated': 0, 'unchanged': 0, 'purged': 0}
+    assert summary['organization']['created'] == 0
+    assert Person.objects.filter(pk='abcdefab-0000-1111-2222-1234567890ab').exists() != safe
+
+
+@pytest.mark.django_db
+def test_import_jurisdiction_chunked(tmpdir, monkeypatch):
+    monkeypatch.setattr(utils, 'DATA_ROOT', str(tmpdir))
+    people = tmpdir.mkdir('nc').mkdir('people')
+    for n in range(3):
+        people.join(f'{n}.yml').write(yaml.safe_dump({
+            'id': f'abcdefab-0000-1111-2222-00000000000{n}', 'name': f'Person {n}',
+            'party': [{'name': 'Green' if n == 2 else 'Democratic'}],
+            'roles': [{'type': 'lower', 'district': 1,
+                       'jurisdiction': 'ocd-jurisdiction/country:us/state:nc'}]
+        }))
+    checkpoint_dir = str(tmpdir.join('checkpoints'))
+
+    # the chunks before the bad file are committed & recorded in the checkpoint
+    with pytest.raises(Organization.DoesNotExist):
+        import_jurisdiction_chunked('nc', 1, checkpoint_dir, force=True)
+    committed = Checkpoint(tmpdir.join('checkpoints', 'nc.checkpoint')).fingerprints
+    assert set(committed) == set(Person.objects.values_list('id', flat=True))
+    assert len(committed) == 2 and 'abcdefab-0000-1111-2222-000000000002' not in committed
+
+    # a re-run skips what was committed, even with force, & the checkpoint goes away
+    people.join('2.yml').write(people.join('2.yml').read().replace('Green', 'Republican'))
+    summary = import_jurisdiction_chunked('nc', 1, checkpoint_dir, force=True)
+    assert summary['status'] == 'committed'
+    assert summary['person'] == {'created': 1, 'updated': 0, 'unchanged': 2, 'purged': 0}
+    assert Person.objects.count() == 3
+    assert not tmpdir.join('checkpoints', 'nc.checkpoint').exists()
+
+
+@pytest.mark.django_db
+def test_import_jurisdiction_chunked_cancelled(tmpdir, monkeypatch):
+    monkeypatch.setattr(utils, 'DATA_ROOT', str(tmpdir))
+    people = tmpdir.mkdir('nc').mkdir('people')
+    for n in range(3):
+        people.join(f'{n}.yml').write(yaml.safe_dump({
+            'id': f'abcdefab-0000-1111-2222-00000000000{n}', 'name': f'Person {n}',
+            'party': [{'name': 'Democratic'}],
+            'roles': [{'type': 'lower', 'district': 99 if n == 2 else 1,
+                       'jurisdiction': 'ocd-jurisdiction/country:us/state:nc'}]
+        }))
+    checkpoint_dir = str(tmpdir.join('checkpoints'))
+
+    # an unknown post cancels its chunk, the ones before it stay committed
+    summary = import_jurisdiction_chunked('nc', 1, checkpoint_dir)
+    assert summary['status'] == 'failed'
+    assert summary['person'] == {'created': 2, 'updated': 0, 'unchanged': 0, 'purged': 0}
+    committed = Checkpoint(tmpdir.join('checkpoints', 'nc.checkpoint')).fingerprints
+    assert set(committed) == set(Person.objects.values_list('id', flat=True))
+    assert len(committed) == 2
+
+    people.join('2.yml').write(people.join('2.yml').read().replace('99', '3'))
+    summary = import_jurisdiction_chunked('nc', 1, checkpoint_dir)
+    assert summary['status'] == 'committed'
+    assert summary['person'] == {'created': 1, 'updated': 0, 'unchanged': 2, 'purged': 0}
+    assert not tmpdir.join('checkpoints', 'nc.checkpoint').exists()
+
+
+@pytest.mark.django_db
+def test_import_jurisdiction_chunked_removed_member(tmpdir, monkeypatch):
+    monkeypatch.setattr(utils, 'DATA_ROOT', str(tmpdir))
+    jurisdiction_id = 'ocd-jurisdiction/country:us/state:nc'
+    people = tmpdir.mkdir('nc').mkdir('people')
+    people.join('Jane-Smith.yml').write(yaml.safe_dump({
+        'id': 'abcdefab-0000-1111-2222-1234567890ab', 'name': 'Jane Smith',
+        'roles': [{'type': 'lower', 'district': 1, 'jurisdiction': jurisdiction_id}]
+    }))
+    committee = tmpdir.join('nc').mkdir('organizations').join('Finance.yml')
+    committee.write(yaml.safe_dump({
+        'id': EXAMPLE_ORG_ID, 'name': 'Finance', 'parent': 'lower',
+        'jurisdiction': jurisdiction_id, 'classification': 'committee',
+        'memberships': [{'id': 'abcdefab-0000-1111-2222-1234567890ab', 'name': 'Jane Smith'}],
+    }))
+    checkpoint_dir = str(tmpdir.join('checkpoints'))
+    assert import_jurisdiction_chunked('nc', 1, checkpoint_dir)['status'] == 'committed'
+
+    # without --purge the import stops before any committee is loaded
+    people.join('Jane-Smith.yml').remove()
+    committee.write(committee.read().replace('name: Finance', 'name: Finance & Taxes'))
+    summary = import_jurisdiction_chunked('nc', 1, checkpoint_dir)
+    assert summary['status'] == 'not purged'
+    assert 'organization' not in summary
+    assert Organization.objects.get(pk=EXAMPLE_ORG_ID).name == 'Finance'
+
+    # with it, a committee can't be given the removed member, as in import_jurisdiction
+    summary = import_jurisdiction_chunked('nc', 1, checkpoint_dir, purge=True)
+    assert summary['status'] == 'failed'
+    assert Organization.objects.get(pk=EXAMPLE_ORG_ID).name == 'Finance'
+    assert Person.objects.filter(pk='abcdefab-0000-1111-2222-1234567890ab').exists()
+
+
+@pytest.mark.django_db
+def test_run_jurisdiction_isolated(tmpdir, monkeypatch, capsys):
+    monkeypatch.setattr(utils, 'DATA_ROOT', str(tmpdir))
+    tmpdir.mkdir('nc').mkdir('people').join('a.yml').write(yaml.safe_dump({
+        'id': 'abcdefab-0000-1111-2222-1234567890ab', 'name': 'Jane Smith',
+        'party': [{'name': 'Green'}],
+    }))
+
+    # the error is logged with its traceback & reported instead of raised
+    summary = run_jurisdiction_isolated('nc', False, False, None, False, False, False, False,
+                                        False)
+    assert summary == {'abbr': 'nc', 'status': 'failed'}
+    assert 'Traceback' in capsys.readouterr().out
+    assert Person.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_cold_load(tmpdir):
+    person_file = tmpdir.join('Jane-Smith.yml')
+    person_file.write(yaml.safe_dump({
+        'id': 'abcdefab-0000-1111-2222-1234567890ab',
+        'name': 'Jane "J\\S" Smith',
+        'party': [{'name': 'Democratic'}],
+        'roles': [{'type': 'lower', 'district': 1,
+                   'jurisdiction': 'ocd-jurisdiction/country:us/state:nc'}],
+        'links': [{'url': 'https://example.com/jane', 'note': 'tab\there'}],
+        'contact_details': [{'note': 'home', 'voice': '333-333-3333',
+                             'address': '123 Main St\nRaleigh'}],
+        'extras': {'nickname': 'JJ'},
+    }))
+    org_file = tmpdir.join('Finance.yml')
+    org_file.write(yaml.safe_dump({
+        'id': EXAMPLE_ORG_ID, 'name': 'Finance', 'parent': 'lower',
+        'jurisdiction': 'ocd-jurisdiction/country:us/state:nc', 'classification': 'committee',
+        'memberships': [{'id': 'abcdefab-0000-1111-2222-1234567890ab', 'name': 'Jane Smith'},
+                        {'name': 'Noah Idy', 'role': 'Chair'}],
+    }))
+
+    profiler = QueryProfiler()
+    with connection.execute_wrapper(profiler), profiler.activate():
+        people, orgs = cold_load([str(person_file)], [str(org_file)],
+                                 'ocd-jurisdiction/country:us/state:nc')
+    assert people['created'] == orgs['created'] == 1
+    # COPY doesn't go through the execute_wrapper but is still profiled
+    assert any(shape.startswith('COPY ') for shape in profiler.shapes)
+
+    p = Person.objects.get(pk='abcdefab-0000-1111-2222-1234567890ab')
+    assert p.name == 'Jane "J\\S" Smith'
+    assert p.extras['nickname'] == 'JJ'
+    assert p.extras[FINGERPRINT_KEY]
+    assert p.created_at is not None
+    assert p.links.get().note == 'tab\there'
+    assert p.contact_details.get(type='address').value == '123 Main St\nRaleigh'
+    assert p.memberships.count() == 3
+    assert p.memberships.get(organization__classification='lower').post.label == '1'
+    o = Organization.objects.get(pk=EXAMPLE_ORG_ID)
+    assert o.parent.name == 'House'
+    assert o.memberships.get(role='Chair').person is None
+
+    # reloading the same files afterwards finds nothing to change
+    summary = load_directory([str(person_file)], 'person',
+                             'ocd-jurisdiction/country:us/state:nc', purge=False, force=True)
+    assert summary['unchanged'] == summary['created'] == summary['updated'] == 0
+    summary = load_directory([str(org_file)], 'organization',
+                             'ocd-jurisdiction/country:us/state:nc', purge=False, force=True)
+    assert summary['updated'] == 0
+
+    # anything already being there means no cold load
+    assert cold_load([str(person_file)], [], 'ocd-jurisdiction/country:us/state:nc') is None
+
+
+@pytest.mark.django_db
+def test_plan_directory(tmpdir):
+    jurisdiction_id = 'ocd-jurisdiction/country:us/state:nc'
+    people = [{'id': f'abcdefab-0000-1111-2222-1234567890a{n}', 'name': f'Person {n}',
+               'roles': [{'type': 'lower', 'district': n, 'jurisdiction': jurisdiction_id}],
+               'links': [{'url': f'https://example.com/{n}'}]}
+              for n in (1, 2)]
+    files = []
+    for person in people:
+        files.append(str(tmpdir.join(person['name'] + '.yml')))
+        with open(files[-1], 'w') as f:
+            yaml.safe_dump(person, f)
+    load_directory(files, 'person', jurisdiction_id, purge=False)
+
+    # unchanged files are counted like an import would
+    assert plan_directory(files, 'person', jurisdiction_id, purge=False) == (
+        [], {'created': 0, 'updated': 0, 'unchanged': 2, 'purged': 0})
+
+    people[0]['name'] = 'Someone Else'
+    people[0]['links'].append({'url': 'https://example.com/extra'})
+    new_person = {'id': 'abcdefab-0000-1111-2222-1234567890a3', 'name': 'Person 3',
+                  'roles': [{'type': 'lower', 'district': 3, 'jurisdiction': jurisdiction_id}]}
+    with open(files[0], 'w') as f:
+        yaml.safe_dump(people[0], f)
+    files[1] = str(tmpdir.join('Person 3.yml'))
+    with open(files[1], 'w') as f:
+        yaml.safe_dump(new_person, f)
+
+    plan, counts = plan_directory(files, 'person', jurisdiction_id, purge=True)
+    assert counts == {'created': 1, 'updated': 1, 'unchanged': 0, 'purged': 1}
+    plan = {entry['id']: entry for entry in plan}
+
+    update = plan[people[0]['id']]
+    assert update['action'] == 'update'
+    assert update['file'] == files[0]
+    assert update['fields']['name'] == ['Person 1', 'Someone Else']
+    assert update['subobjects']['links'] == {
+        'removed': [], 'added': [{'url': 'https://example.com/extra', 'note': ''}]
+    }
+    assert plan[new_person['id']]['action'] == 'create'
+    assert plan[people[1]['id']]['action'] == 'purge'
+
+    # nothing was actually changed
+    assert Person.objects.get(pk=people[0]['id']).name == 'Person 1'
+    assert not Person.objects.filter(pk=new_person['id']).exists()
+    assert Person.objects.filter(pk=people[1]['id']).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_plan_jurisdiction_would_cancel(tmpdir, monkeypatch):
+    monkeypatch.setattr(utils, 'DATA_ROOT', str(tmpdir))
+    jurisdiction_id = 'ocd-jurisdiction/country:us/state:nc'
+    people = tmpdir.mkdir('nc').mkdir('people')
+    people.join('Jane-Smith.yml').write(yaml.safe_dump({
+        'id': 'abcdefab-0000-1111-2222-1234567890ab', 'name': 'Jane Smith',
+        'roles': [{'type': 'lower', 'district': 1, 'jurisdiction': jurisdiction_id}]
+    }))
+    tmpdir.join('nc').mkdir('organizations').join('Finance.yml').write(yaml.safe_dump({
+        'id': EXAMPLE_ORG_ID, 'name': 'Finance', 'parent': 'lower',
+        'jurisdiction': jurisdiction_id, 'classification': 'committee',
+        'memberships': [{'id': 'ocd-person/no-such-person', 'name': 'Noah Idy'}],
+    }))
+
+    # the committee's unknown member cancels the plan, but the people were already planned
+    summary = plan_jurisdiction('nc')
+    assert summary['status'] == 'would cancel'
+    assert [entry['action'] for entry in summary['plan']] == ['create']
+    assert summary['person']['created'] == 1
+
+    # as does a district without a post
+    people.join('Jane-Smith.yml').write(people.join('Jane-Smith.yml').read().replace(
+        'district: 1', 'district: 99'))
+    summary = plan_jurisdiction('nc')
+    assert summary['status'] == 'would cancel'
+    assert summary['plan'] == []
+    assert not Person.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_plan_jurisdiction_purged_member(tmpdir, monkeypatch):
+    monkeypatch.setattr(utils, 'DATA_ROOT', str(tmpdir))
+    jurisdiction_id = 'ocd-jurisdiction/country:us/state:nc'
+    people = tmpdir.mkdir('nc').mkdir('people')
+    people.join('Jane-Smith.yml').write(yaml.safe_dump({
+        'id': 'abcdefab-0000-1111-2222-1234567890ab', 'name': 'Jane Smith',
+        'roles': [{'type': 'lower', 'district': 1, 'jurisdiction': jurisdiction_id}]
+    }))
+    committee = tmpdir.join('nc').mkdir('organizations').join('Finance.yml')
+    committee.write(yaml.safe_dump({
+        'id': EXAMPLE_ORG_ID, 'name': 'Finance', 'parent': 'lower',
+        'jurisdiction': jurisdiction_id, 'classification': 'committee',
+        'memberships': [{'id': 'abcdefab-0000-1111-2222-1234567890ab', 'name': 'Jane Smith'}],
+    }))
+    assert import_jurisdiction('nc')['status'] == 'committed'
+
+    # the purged person can't stay a member, as the import would find
+    people.join('Jane-Smith.yml').remove()
+    committee.write(committee.read().replace('name: Finance', 'name: Finance & Taxes'))
+    summary = plan_jurisdiction('nc', purge=True)
+    assert summary['status'] == 'would cancel'
+    assert [entry['action'] for entry in summary['plan']] == ['purge']
+
+    # READ ONLY can't be scoped to the plan inside someone else's transaction
+    with transaction.atomic():
+        with pytest.raises(AssertionError):
+            plan_jurisdiction('nc')
@@ -0,0 +1,38 @@
+import yaml
+from to_database import diff_subobjects, get_fingerprint, parse_files, parse_pipelined
+
+
+def test_diff_subobjects():
+    class Row:
+        def __init__(self, url, note=''):
+            self.url = url
+            self.note = note
+
+    rows = [Row('https://a'), Row('https://a'), Row('https://b', 'old')]
+    objects = [{'url': 'https://a'}, {'url': 'https://b', 'note': 'new'}, {'url': 'https://c'}]
+    to_delete, to_create = diff_subobjects(rows, objects, ('url', 'note'))
+
+    # only one of the duplicate rows is still wanted
+    assert [(row.url, row.note) for row in to_delete] == [('https://a', ''), ('https://b', 'old')]
+    assert to_create == [{'url': 'https://b', 'note': 'new'}, {'url': 'https://c'}]
+
+
+def test_get_fingerprint():
+    data = {'id': 'abc', 'name': 'Jane Smith', 'links': [{'url': 'https://example.com'}]}
+    assert get_fingerprint(data) == get_fingerprint(dict(reversed(list(data.items()))))
+    assert get_fingerprint(data) != get_fingerprint(dict(data, name='Jane Doe'))
+
+
+def test_parse_files_pipelined(tmpdir):
+    files = []
+    for n in range(7):
+        filename = str(tmpdir.join(f'{n}.yml'))
+        with open(filename, 'w') as f:
+            yaml.safe_dump({'id': str(n), 'name': f'Person {n}'}, f)
+        files.append(filename)
+
+    # results come back in file order however far ahead the workers are
+    assert [result[0] for result in parse_pipelined(files, 2, queue_size=3)] == files
+    fingerprints = {'3': get_fingerprint({'id': '3', 'name': 'Person 3'})}
+    assert (list(parse_files(files, fingerprints=fingerprints, parse_jobs=3)) ==
+            list(parse_files(files, fingerprints=fingerprints)))
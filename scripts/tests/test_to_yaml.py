@@ -0,0 +1,186 @@
+import os
+import json
+import tarfile
+import zipfile
+import pytest
+from utils import load_yaml
+from yaml_dump import dump_yaml
+from to_yaml import (scan_dir, process_dir, process_input, get_abbr, get_record_type,
+                     get_person_keys, read_tar, read_zip, read_jsonl)
+
+JURISDICTION_ID = 'ocd-jurisdiction/country:us/state:nc/government'
+
+
+def membership(organization_id, person_id, person_name, **kwargs):
+    return dict({'organization_id': organization_id, 'person_id': person_id,
+                 'person_name': person_name, 'role': 'member', 'start_date': '',
+                 'end_date': '', 'post_id': None}, **kwargs)
+
+
+SCRAPE = {
+    'organization_c1.json': {
+        '_id': 'c1', 'name': 'Finance', 'classification': 'committee',
+        'parent_id': '~{"classification": "lower"}', 'links': [],
+        'sources': [{'url': 'https://example.com/finance', 'note': ''}],
+    },
+    'organization_p1.json': {
+        '_id': 'p1', 'name': 'Democratic', 'classification': 'party',
+        'parent_id': None, 'links': [], 'sources': [],
+    },
+    'membership_1.json': membership('~{"classification": "lower"}', 'a1', 'Jane Smith',
+                                    post_id='~{"label": "4"}'),
+    'membership_2.json': membership('~{"classification": "party", "name": "Democratic"}',
+                                    'a1', 'Jane Smith'),
+    'membership_3.json': membership('c1', 'a1', 'Jane Smith', role='Chair'),
+    'membership_4.json': membership('c1', '~{"name": "Noah Idy"}', 'Noah Idy'),
+    'person_a1.json': {
+        '_id': 'a1', 'name': 'Jane Smith', 'image': 'https://example.com/jane.jpg',
+        'links': [], 'sources': [{'url': 'https://example.com/jane', 'note': ''}],
+        'contact_details': [{'type': 'voice', 'value': '919-555-1234', 'note': 'Capitol'}],
+        'extras': {}, 'identifiers': [],
+    },
+}
+
+
+@pytest.fixture
+def scrape_dir(tmpdir):
+    scrape = tmpdir.mkdir('scrape')
+    for filename, data in SCRAPE.items():
+        scrape.join(filename).write(json.dumps(data))
+    scrape.join('jurisdiction_nc.json').write('{}')
+    return scrape
+
+
+def test_scan_dir(scrape_dir):
+    files = scan_dir(str(scrape_dir))
+    assert [os.path.basename(f) for f in files['organization']] == [
+        'organization_c1.json', 'organization_p1.json']
+    assert len(files['membership']) == 4
+    assert len(files['person']) == 1
+
+
+def check_output(output):
+    person_file, = output.join('people').listdir()
+    person = load_yaml(person_file.read())
+    assert person['name'] == 'Jane Smith'
+    assert person['party'] == [{'name': 'Democratic'}]
+    assert person['roles'] == [{'type': 'lower', 'district': '4',
+                                'jurisdiction': JURISDICTION_ID}]
+
+    org_file, = output.join('organizations').listdir()
+    org = load_yaml(org_file.read())
+    assert org['parent'] == 'lower'
+    assert org['memberships'] == [{'id': person['id'], 'name': 'Jane Smith', 'role': 'Chair'},
+                                  {'name': 'Noah Idy'}]
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_process_dir(tmpdir, scrape_dir, jobs):
+    output = tmpdir.mkdir('nc')
+    output.mkdir('people')
+    output.mkdir('organizations')
+    process_dir(str(scrape_dir), str(output), JURISDICTION_ID, jobs)
+    check_output(output)
+
+
+def write_archive(tmpdir, scrape_dir, format):
+    if format == 'tar.gz':
+        input_file = str(tmpdir.join('nc.tar.gz'))
+        with tarfile.open(input_file, 'w:gz') as archive:
+            archive.add(str(scrape_dir), arcname='nc')
+    elif format == 'zip':
+        input_file = str(tmpdir.join('nc.zip'))
+        with zipfile.ZipFile(input_file, 'w') as archive:
+            for filename in scrape_dir.listdir():
+                archive.write(str(filename), arcname='nc/' + filename.basename)
+    else:
+        input_file = str(tmpdir.join('nc.jsonl'))
+        with open(input_file, 'w') as f:
+            for filename, data in SCRAPE.items():
+                f.write(json.dumps(dict(data, _type=filename.split('_')[0])) + '\n')
+    return input_file
+
+
+@pytest.mark.parametrize('format', ['tar.gz', 'zip', 'jsonl'])
+def test_process_input_archive(tmpdir, scrape_dir, format):
+    input_file = write_archive(tmpdir, scrape_dir, format)
+    assert get_abbr(input_file) == 'nc'
+
+    output = tmpdir.mkdir('nc')
+    output.mkdir('people')
+    output.mkdir('organizations')
+    process_input(input_file, str(output), JURISDICTION_ID)
+    check_output(output)
+
+
+@pytest.mark.parametrize('format,reader', [('tar.gz', read_tar), ('zip', read_zip),
+                                           ('jsonl', read_jsonl)])
+def test_read_archive_lazily(tmpdir, scrape_dir, format, reader):
+    input_file = write_archive(tmpdir, scrape_dir, format)
+    records = reader(input_file, 'organization')
+    # nothing is read until the first record is asked for
+    assert not isinstance(records, list)
+    assert sorted(org['_id'] for org in records) == ['c1', 'p1']
+
+
+def test_get_record_type():
+    assert get_record_type(SCRAPE['membership_1.json']) == 'membership'
+    assert get_record_type(SCRAPE['organization_c1.json']) == 'organization'
+    assert get_record_type({'name': 'Jane Smith', 'given_name': 'Jane'}) == 'person'
+    assert get_record_type({'_type': 'person', 'name': 'Jane Smith'}) == 'person'
+    assert get_record_type({'_type': 'bill'}) is None
+
+
+def test_get_person_keys():
+    person = {'name': 'Jane  Smith, Jr.', 'ids': {'legacy_openstates': 'NCL000123'},
+              'other_identifiers': [{'scheme': 'votesmart', 'identifier': '13823'}],
+              'roles': [{'type': 'lower', 'district': 4}]}
+    assert get_person_keys(person) == [('legacy_openstates', 'NCL000123'),
+                                       ('votesmart', '13823'),
+                                       ('name', 'jane smith jr', 'lower', '4')]
+
+
+def test_process_dir_keeps_ids(tmpdir, scrape_dir):
+    output = tmpdir.mkdir('nc')
+    output.mkdir('people')
+    output.mkdir('organizations')
+    process_dir(str(scrape_dir), str(output), JURISDICTION_ID)
+    before = {f.basename: load_yaml(f.read())['id']
+              for f in output.join('people').listdir() + output.join('organizations').listdir()}
+
+    # a re-conversion matches by name & district even when the name is formatted differently
+    person = dict(SCRAPE['person_a1.json'], name='JANE SMITH')
+    scrape_dir.join('person_a1.json').write(json.dumps(person))
+    # only the person's file changed, the committee's is left alone
+    assert process_dir(str(scrape_dir), str(output), JURISDICTION_ID) == {'written': 1,
+                                                                          'unchanged': 1}
+    after = {f.basename: load_yaml(f.read())['id']
+             for f in output.join('people').listdir() + output.join('organizations').listdir()}
+    assert after == before
+
+    org_file, = output.join('organizations').listdir()
+    assert load_yaml(org_file.read())['memberships'][0]['id'] in before.values()
+
+
+def test_process_dir_matches_retired(tmpdir, scrape_dir):
+    output = tmpdir.mkdir('nc')
+    output.mkdir('people')
+    output.mkdir('organizations')
+    process_dir(str(scrape_dir), str(output), JURISDICTION_ID)
+
+    # Jane Smith retired since the last conversion
+    person_file, = output.join('people').listdir()
+    person = load_yaml(person_file.read())
+    person['roles'][0]['end_date'] = '2019-01-01'
+    retired = output.mkdir('retired')
+    basename = person_file.basename
+    retired.join(basename).write(dump_yaml(person))
+    person_file.remove()
+
+    # and is back in this scrape, with the same id & filename
+    process_dir(str(scrape_dir), str(output), JURISDICTION_ID)
+    assert retired.listdir() == []
+    person_file, = output.join('people').listdir()
+    assert person_file.basename == basename
+    assert load_yaml(person_file.read())['id'] == person['id']
+    assert 'end_date' not in load_yaml(person_file.read())['roles'][0]
@@ -1,5 +1,11 @@
+import os
+import glob
 import pytest
-from utils import reformat_phone_number, reformat_address, role_is_active
+import yaml
+import yamlordereddictloader
+from collections import OrderedDict
+from utils import (reformat_phone_number, reformat_address, role_is_active, load_yaml,
+                   set_as_of_date, get_as_of_date, get_all_abbrs, dump_obj)
 
 
 @pytest.mark.parametrize("input,output", [
@@ -35,3 +41,57 @@ def test_reformat_address(input, output):
 ])
 def test_role_is_active(role, expected):
     assert role_is_active(role) == expected
+
+
+def test_role_is_active_as_of():
+    role = {"name": "C", "end_date": "1990-01-01"}
+    assert role_is_active(role, "1989-12-31")
+    assert not role_is_active(role, "1990-01-01")
+    try:
+        set_as_of_date("1985-01-01")
+        assert get_as_of_date() == "1985-01-01"
+        assert role_is_active(role)
+    finally:
+        set_as_of_date(None)
+    assert not role_is_active(role)
+
+
+def test_load_yaml_corpus_parity():
+    # the fast loader must produce exactly what the pure-Python ordered loader does
+    filenames = glob.glob(os.path.join(os.path.dirname(__file__), '../../test/*/*/*.yml'))
+    assert filenames
+    for filename in filenames:
+        with open(filename) as f:
+            content = f.read()
+        fast = load_yaml(content)
+        slow = yaml.load(content, Loader=yamlordereddictloader.SafeLoader)
+        assert type(fast) is OrderedDict
+        # OrderedDict equality is order-sensitive, so this checks key order too
+        assert fast == slow, filename
+
+
+def test_get_all_abbrs():
+    abbrs = get_all_abbrs()
+    assert abbrs == sorted(abbrs)
+    assert 'ak' in abbrs
+    assert all(os.path.isdir(os.path.join(os.path.dirname(__file__), '../../test', abbr))
+               for abbr in abbrs)
+
+
+def test_dump_obj_if_changed(tmpdir):
+    obj = OrderedDict(id='ocd-person/abc', name='Jane Smith')
+    filename = str(tmpdir.join('Jane-Smith-abc.yml'))
+    assert dump_obj(obj, output_dir=str(tmpdir), if_changed=True) is True
+    assert load_yaml(open(filename).read()) == obj
+    os.utime(filename, (0, 0))
+
+    # the same content leaves the file alone, unless if_changed isn't set
+    assert dump_obj(obj, filename=filename, if_changed=True) is False
+    assert os.stat(filename).st_mtime == 0
+    assert dump_obj(obj, filename=filename) is True
+    assert os.stat(filename).st_mtime != 0
+
+    obj['name'] = 'Jane Doe'
+    assert dump_obj(obj, filename=filename, if_changed=True) is True
+    assert load_yaml(open(filename).read())['name'] == 'Jane Doe'
+    assert tmpdir.listdir() == [tmpdir.join('Jane-Smith-abc.yml')]
@@ -0,0 +1,90 @@
+import os
+import glob
+import random
+import datetime
+import pytest
+from collections import OrderedDict
+from utils import load_yaml
+from synthetic import generate_corpus
+from yaml_dump import dump_yaml, fast_dump, generic_dump, Unsupported
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), '../../test')
+
+TRICKY_STRINGS = [
+    '', ' ', 'a', '-', '- a', '-a', '?', '? a', ':', ': a', ':a', 'a:', 'a:b', 'a: b',
+    'a #b', 'a#b', '#a', '---a', '...a', '.a', "it's", "'quoted'", '"double"', '@a', '`a',
+    'a, b', '[a]', '{a}', '!a', '&a', '*a', '|a', '>a', '%a', ' a', 'a ', 'a  b',
+    'yes', 'No', 'on', 'OFF', 'null', 'Null', '~', 'true', 'False', '1', '-1', '0x1F',
+    '0o17', '1_000', '1.5', '1e3', '.inf', '-.Inf', '.NaN', '2018-01-01',
+    '2018-01-01 10:00:00', '1:30', '<<', '=', 'https://example.com/a?b=c#d',
+    'Room 100;1 Capitol Sq', '919-555-1234', 'Smith, Jr.', 'tab\there', 'new\nline',
+    'César Chávez',
+]
+
+
+def assert_same(obj):
+    assert dump_yaml(obj) == generic_dump(obj)
+
+
+def test_corpus_round_trip():
+    files = glob.glob(os.path.join(TEST_DATA, '*/*/*.yml'))
+    fast = 0
+    for filename in files:
+        with open(filename) as f:
+            obj = load_yaml(f)
+        assert dump_yaml(obj) == generic_dump(obj), filename
+        try:
+            fast_dump(obj)
+            fast += 1
+        except Unsupported:
+            pass
+    # only files with non-ASCII names need PyYAML's escaping
+    assert files and fast >= len(files) * 0.9
+
+
+def test_synthetic_corpus_round_trip(tmpdir):
+    generate_corpus(str(tmpdir), states=2, people=10, retired=2, committees=3)
+    for filename in glob.glob(str(tmpdir.join('*/*/*.yml'))):
+        with open(filename) as f:
+            content = f.read()
+        obj = load_yaml(content)
+        assert fast_dump(obj) == generic_dump(obj) == content
+
+
+@pytest.mark.parametrize('text', TRICKY_STRINGS)
+def test_tricky_strings(text):
+    assert_same(OrderedDict(name=text))
+    assert_same(OrderedDict(links=[text, OrderedDict(url=text, note=text)]))
+    assert_same({'extras': {text or 'empty': text}})
+
+
+def test_line_folding():
+    words = ' '.join(['word'] * 30)
+    quoted = " ".join(["it's"] * 30)
+    for text in (words, quoted, 'x' * 90 + ' y', words.replace(' ', '  ')):
+        assert_same(OrderedDict(biography=text,
+                                extras=OrderedDict(nested=OrderedDict(deeper=text)),
+                                other_names=[text, OrderedDict(name=text, note=[text])]))
+
+
+def test_other_values():
+    assert_same(OrderedDict(district=4, active=True, end_date=None,
+                            start_date=datetime.date(2019, 1, 1), links=[], extras={},
+                            roles=[[], {}]))
+    # these all need the generic dumper, which dump_yaml falls back to
+    shared = [OrderedDict(url='https://example.com')]
+    date = datetime.date(2019, 1, 1)
+    for obj in (OrderedDict(links=shared, sources=shared), OrderedDict(a=date, b=date),
+                OrderedDict(roles=[['lower']]), OrderedDict(score=1.5),
+                OrderedDict([(1, 'a')]), OrderedDict([('k' * 130, 'a')]), {}):
+        with pytest.raises(Unsupported):
+            fast_dump(obj)
+        assert_same(obj)
+
+
+def test_random_strings():
+    rng = random.Random(0)
+    alphabet = "ab  '\":-#?,[]{}&*!|>%@`.~01yY"
+    for _ in range(2000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.choice([1, 3, 10, 85, 150])))
+        assert_same(OrderedDict(name=text, links=[OrderedDict(note=text)]))
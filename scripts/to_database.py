@@ -1,18 +1,209 @@
 #!/usr/bin/env python
+import io
 import os
+import sys
 import glob
-import yaml
+import json
+import datetime
+import hashlib
+import traceback
+from collections import defaultdict, deque, Counter
+from functools import partial
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 import django
 from django import conf
-from django.db import transaction
+from django.db import connection, transaction
+from django.utils import timezone
 import click
-from utils import get_data_dir, get_jurisdiction_id
+from utils import get_data_dir, get_jurisdiction_id, get_all_abbrs
+from snapshot import open_refreshed, load_file
+from db_profile import QueryProfiler, phase, profile_file, untracked_query
 
 
 class CancelTransaction(Exception):
     pass
 
 
+# fingerprints of the YAML each object was loaded from are kept in extras under this key,
+# bump the version whenever a change to this script means every file needs reloading
+FINGERPRINT_KEY = 'yaml_fingerprint'
+FINGERPRINT_VERSION = 1
+# how many files --parse-jobs workers may parse ahead of the database writes
+PARSE_QUEUE_SIZE = 200
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), '../.checkpoints')
+
+CHAMBER_CLASSIFICATIONS = ('upper', 'lower', 'legislature')
+
+# the columns that distinguish sub-objects, the foreign key to the owner is skipped
+SUBOBJECT_FIELDS = {
+    'other_names': ('name', 'note', 'start_date', 'end_date'),
+    'links': ('url', 'note'),
+    'sources': ('url', 'note'),
+    'identifiers': ('scheme', 'identifier'),
+    'contact_details': ('type', 'value', 'note', 'label'),
+    'memberships': ('organization', 'person', 'post', 'person_name', 'role', 'label',
+                    'start_date', 'end_date'),
+}
+FOREIGN_KEYS = ('organization', 'person', 'post')
+
+
+def subobject_key(item, fields):
+    """ a comparable tuple for either a sub-object dict or a database row """
+    key = []
+    for field in fields:
+        if isinstance(item, dict):
+            value = item.get(field)
+            if field in FOREIGN_KEYS:
+                value = value.pk if value is not None else None
+            else:
+                value = '' if value is None else str(value)
+        elif field in FOREIGN_KEYS:
+            value = getattr(item, field + '_id')
+        else:
+            value = getattr(item, field)
+        key.append(value)
+    return tuple(key)
+
+
+def get_subobject_fields(ModelCls, fieldname):
+    """ the fields to compare for one of ModelCls's sub-object relations """
+    owner_field = ModelCls._meta.get_field(fieldname).field.name
+    return [field for field in SUBOBJECT_FIELDS[fieldname] if field != owner_field]
+
+
+def diff_subobjects(rows, objects, fields):
+    """
+    returns the rows to delete & the objects to create to turn rows into objects
+
+    duplicates count, so two identical links in the YAML need two identical rows
+    """
+    remaining = defaultdict(list)
+    for row in rows:
+        remaining[subobject_key(row, fields)].append(row)
+
+    to_create = []
+    for obj in objects:
+        matches = remaining.get(subobject_key(obj, fields))
+        if matches:
+            matches.pop()
+        else:
+            to_create.append(obj)
+
+    to_delete = [row for rows in remaining.values() for row in rows]
+    return to_delete, to_create
+
+
+class Resolver:
+    """
+    per-run cache of the organizations, posts & people that YAML files refer to
+
+    parties, each jurisdiction's chambers & posts and the people with a membership in a
+    jurisdiction are each loaded with a single query the first time they're needed
+    """
+
+    def __init__(self):
+        self.parties = None
+        self.chambers = {}
+        self.posts = {}
+        self.organizations = {}
+        self.people = {}
+        self.people_jurisdictions = set()
+        self.removed_people = set()
+
+    def load_jurisdiction(self, jurisdiction_id):
+        from opencivicdata.core.models import Organization, Post
+
+        chambers = self.chambers[jurisdiction_id] = {}
+        for org in Organization.objects.filter(jurisdiction_id=jurisdiction_id,
+                                               classification__in=CHAMBER_CLASSIFICATIONS):
+            # as Organization.objects.get would, rather than picking one arbitrarily
+            if org.classification in chambers:
+                raise Organization.MultipleObjectsReturned(
+                    f'{jurisdiction_id} has more than one {org.classification} organization')
+            chambers[org.classification] = org
+        for post in Post.objects.filter(organization__in=list(chambers.values())):
+            self.posts[(post.organization_id, post.label)] = post
+
+    def get_party(self, name):
+        from opencivicdata.core.models import Organization
+
+        if self.parties is None:
+            self.parties = {org.name: org for org in
+                            Organization.objects.filter(classification='party')}
+        try:
+            return self.parties[name]
+        except KeyError:
+            click.secho(f"no such party {name}", fg='red')
+            raise Organization.DoesNotExist(name)
+
+    def get_chamber(self, jurisdiction_id, classification):
+        """ the upper, lower or legislature organization by classification, or None """
+        if jurisdiction_id not in self.chambers:
+            self.load_jurisdiction(jurisdiction_id)
+        return self.chambers[jurisdiction_id].get(classification)
+
+    def get_post(self, role):
+        """ returns the (organization, post) for a legislative role """
+        org = self.get_chamber(role['jurisdiction'], role['type'])
+        if org is None:
+            click.secho(f"no such organization {role['jurisdiction']} {role['type']}",
+                        fg='red')
+            raise CancelTransaction()
+        try:
+            return org, self.posts[(org.id, str(role['district']))]
+        except KeyError:
+            click.secho(f"no such post {role}", fg='red')
+            raise CancelTransaction()
+
+    def get_parent(self, data):
+        from opencivicdata.core.models import Organization
+
+        parent_id = data['parent']
+        if parent_id.startswith('ocd-organization'):
+            if parent_id not in self.organizations:
+                self.organizations[parent_id] = Organization.objects.get(pk=parent_id)
+            return self.organizations[parent_id]
+
+        parent = self.get_chamber(data['jurisdiction'], parent_id)
+        if parent is None:
+            raise Organization.DoesNotExist(f"{data['jurisdiction']} {parent_id}")
+        return parent
+
+    def add_organization(self, org):
+        """ make an organization that may not be saved yet available as a parent """
+        self.organizations[org.id] = org
+
+    def add_person(self, person):
+        """ make a person that may not be saved yet available to committee memberships """
+        self.people[person.id] = person
+
+    def exclude_people(self, ids):
+        """ people whose files were removed, committee memberships can't refer to them """
+        self.removed_people |= set(ids)
+
+    def get_person(self, id, jurisdiction_id):
+        from opencivicdata.core.models import Person
+
+        id = str(id)
+        if id in self.removed_people:
+            click.secho(f"no such person {id}, its file was removed", fg='red')
+            raise CancelTransaction()
+        if jurisdiction_id not in self.people_jurisdictions:
+            self.people_jurisdictions.add(jurisdiction_id)
+            for person in Person.objects.filter(
+                    memberships__organization__jurisdiction_id=jurisdiction_id).only('id'):
+                self.people[person.id] = person
+        if id not in self.people:
+            # people without a membership in the jurisdiction yet
+            try:
+                self.people[id] = Person.objects.only('id').get(pk=id)
+            except Person.DoesNotExist:
+                click.secho(f"no such person {id}", fg='red')
+                raise CancelTransaction()
+        return self.people[id]
+
+
 def update_subobjects(person, fieldname, objects, read_manager=None):
     """ returns True if there are any updates """
     # we need the default manager for this field in case we need to do updates
@@ -23,40 +214,45 @@ def update_subobjects(person, fieldname, objects, read_manager=None):
     if read_manager is None:
         read_manager = manager
 
-    current_count = read_manager.count()
-    updated = False
-
-    # if counts differ, we need to do an update for sure
-    if current_count != len(objects):
-        updated = True
+    # only the rows that differ are deleted or created, unchanged rows are left alone
+    to_delete, to_create = diff_subobjects(read_manager.all(), objects,
+                                           get_subobject_fields(type(person), fieldname))
+    if to_delete:
+        read_manager.filter(pk__in=[row.pk for row in to_delete]).delete()
+    for obj in to_create:
+        manager.create(**obj)
 
-    # check if all objects exist
-    for obj in objects:
-        if updated:
-            break
-        if read_manager.filter(**obj).count() != 1:
-            updated = True
-
-    # if there's been an update, wipe the old & insert the new
+    updated = bool(to_delete or to_create)
     if updated:
-        if current_count:
-            read_manager.all().delete()
-        for obj in objects:
-            manager.create(**obj)
         # save to bump updated_at timestamp
         person.save()
 
     return updated
 
 
-def get_update_or_create(ModelCls, data):
+def plan_value(value):
+    """ a field value for --plan output, related objects are shown by id """
+    return getattr(value, 'pk', value)
+
+
+def set_fields(obj, data):
+    """ returns True if any of obj's fields were changed to match data """
+    updated = False
+    for field, value in data.items():
+        if getattr(obj, field) != value:
+            setattr(obj, field, value)
+            updated = True
+    return updated
+
+
+def get_update_or_create(ModelCls, data, merge_extras=False):
+    """ if merge_extras is set, data's extras are added to the existing object's """
     updated = created = False
     try:
         obj = ModelCls.objects.get(pk=data['id'])
-        for field, value in data.items():
-            if getattr(obj, field) != value:
-                setattr(obj, field, value)
-                updated = True
+        if merge_extras:
+            data = dict(data, extras=dict(obj.extras, **data['extras']))
+        updated = set_fields(obj, data)
         if updated:
             obj.save()
     except ModelCls.DoesNotExist:
@@ -65,33 +261,27 @@ def get_update_or_create(ModelCls, data):
     return obj, created, updated
 
 
-def load_person(data):
-    # import has to be here so that Django is set up
-    from opencivicdata.core.models import Person, Organization, Post
-
-    fields = dict(id=data['id'],
-                  name=data['name'],
-                  given_name=data.get('given_name', ''),
-                  family_name=data.get('family_name', ''),
-                  gender=data.get('gender', ''),
-                  biography=data.get('biography', ''),
-                  birth_date=data.get('birth_date', ''),
-                  death_date=data.get('death_date', ''),
-                  image=data.get('image', ''),
-                  extras=data.get('extras', {}),
-                  )
-    person, created, updated = get_update_or_create(Person, fields)
-
-    updated |= update_subobjects(person, 'other_names', data.get('other_names', []))
-    updated |= update_subobjects(person, 'links', data.get('links', []))
-    updated |= update_subobjects(person, 'sources', data.get('sources', []))
+def get_person_fields(data):
+    return dict(id=data['id'],
+                name=data['name'],
+                given_name=data.get('given_name', ''),
+                family_name=data.get('family_name', ''),
+                gender=data.get('gender', ''),
+                biography=data.get('biography', ''),
+                birth_date=data.get('birth_date', ''),
+                death_date=data.get('death_date', ''),
+                image=data.get('image', ''),
+                extras=data.get('extras', {}),
+                )
+
 
+def get_person_subobjects(data):
+    """ everything but memberships, as lists of field dicts keyed by related name """
     identifiers = []
     for scheme, value in data.get('ids', {}).items():
         identifiers.append({'scheme': scheme, 'identifier': value})
     for identifier in data.get('other_identifiers', []):
         identifiers.append(identifier)
-    updated |= update_subobjects(person, 'identifiers', identifiers)
 
     contact_details = []
     for cd in data.get('contact_details', []):
@@ -100,37 +290,52 @@ def load_person(data):
                 contact_details.append({'note': cd.get('note', ''),
                                         'type': type,
                                         'value': cd[type]})
-    updated |= update_subobjects(person, 'contact_details', contact_details)
 
+    return {
+        'other_names': data.get('other_names', []),
+        'links': data.get('links', []),
+        'sources': data.get('sources', []),
+        'identifiers': identifiers,
+        'contact_details': contact_details,
+    }
+
+
+def get_person_membership(role, org, post=None):
+    """ a party (without a post) or legislative role membership """
+    membership = {'organization': org,
+                  'start_date': role.get('start_date', ''),
+                  'end_date': role.get('end_date', '')}
+    if post:
+        membership['post'] = post
+    return membership
+
+
+def get_person_memberships(data, resolver):
+    """ party & legislative role memberships """
     memberships = []
     for party in data.get('party', []):
-        try:
-            org = Organization.objects.get(classification='party', name=party['name'])
-        except Organization.DoesNotExist:
-            click.secho(f"no such party {party['name']}", fg='red')
-            raise
-        memberships.append({'organization': org,
-                            'start_date': party.get('start_date', ''),
-                            'end_date': party.get('end_date', '')})
+        memberships.append(get_person_membership(party, resolver.get_party(party['name'])))
     for role in data.get('roles', []):
-        if role['type'] in ('upper', 'lower', 'legislature'):
-            try:
-                org = Organization.objects.get(classification=role['type'],
-                                               jurisdiction_id=role['jurisdiction'])
-                post = org.posts.get(label=role['district'])
-            except Organization.DoesNotExist:
-                click.secho(f"no such organization {role['jurisdiction']} {role['type']}",
-                            fg='red')
-                raise CancelTransaction()
-            except Post.DoesNotExist:
-                click.secho(f"no such post {role}", fg='red')
-                raise CancelTransaction()
-        else:
+        if role['type'] not in CHAMBER_CLASSIFICATIONS:
             raise ValueError('unsupported role type')
-        memberships.append({'organization': org,
-                            'post': post,
-                            'start_date': role.get('start_date', ''),
-                            'end_date': role.get('end_date', '')})
+        org, post = resolver.get_post(role)
+        memberships.append(get_person_membership(role, org, post))
+    return memberships
+
+
+def load_person(data, resolver=None):
+    # import has to be here so that Django is set up
+    from opencivicdata.core.models import Person
+
+    if resolver is None:
+        resolver = Resolver()
+
+    person, created, updated = get_update_or_create(Person, get_person_fields(data))
+
+    for fieldname, objects in get_person_subobjects(data).items():
+        updated |= update_subobjects(person, fieldname, objects)
+
+    memberships = get_person_memberships(data, resolver)
 
     # note that we don't manager committee memberships here
     updated |= update_subobjects(
@@ -141,17 +346,14 @@ def load_person(data):
     return created, updated
 
 
-def load_org(data):
-    from opencivicdata.core.models import Organization, Person
-
-    parent_id = data['parent']
-    if parent_id.startswith('ocd-organization'):
-        parent = Organization.objects.get(pk=parent_id)
-    else:
-        parent = Organization.objects.get(jurisdiction_id=data['jurisdiction'],
-                                          classification=parent_id)
-
-    fields = dict(
+def get_org_fields(data, parent, org=None):
+    """
+    committee files have no extras of their own, so the fingerprint is added to org's
+    existing extras rather than replacing them (load_org merges them the same way)
+    """
+    extras = dict(org.extras) if org else {}
+    extras.update(data.get('extras', {}))
+    return dict(
         id=data['id'],
         name=data['name'],
         jurisdiction_id=data['jurisdiction'],
@@ -159,68 +361,490 @@ def load_org(data):
         founding_date=data.get('founding_date', ''),
         dissolution_date=data.get('dissolution_date', ''),
         parent=parent,
+        extras=extras,
     )
-    org, created, updated = get_update_or_create(Organization, fields)
 
-    updated |= update_subobjects(org, 'links', data.get('links', []))
-    updated |= update_subobjects(org, 'sources', data.get('sources', []))
 
+def get_org_membership(role, person):
+    return {'person': person,
+            'person_name': role['name'],
+            'role': role.get('role', 'member'),
+            'start_date': role.get('start_date', ''),
+            'end_date': role.get('end_date', '')}
+
+
+def get_org_memberships(data, resolver):
     memberships = []
     for role in data.get('memberships', []):
         if role.get('id'):
-            try:
-                person = Person.objects.get(pk=role['id'])
-            except Person.DoesNotExist:
-                click.secho(f"no such person {role['id']}", fg='red')
-                raise CancelTransaction()
+            person = resolver.get_person(role['id'], data['jurisdiction'])
         else:
             person = None
+        memberships.append(get_org_membership(role, person))
+    return memberships
+
+
+def load_org(data, resolver=None):
+    from opencivicdata.core.models import Organization
+
+    if resolver is None:
+        resolver = Resolver()
 
-        memberships.append({'person': person,
-                            'person_name': role['name'],
-                            'role': role.get('role', 'member'),
-                            'start_date': role.get('start_date', ''),
-                            'end_date': role.get('end_date', '')})
-    updated |= update_subobjects(org, 'memberships', memberships)
+    parent = resolver.get_parent(data)
+    org, created, updated = get_update_or_create(Organization, get_org_fields(data, parent),
+                                                 merge_extras=True)
+    resolver.add_organization(org)
+
+    updated |= update_subobjects(org, 'links', data.get('links', []))
+    updated |= update_subobjects(org, 'sources', data.get('sources', []))
+    updated |= update_subobjects(org, 'memberships', get_org_memberships(data, resolver))
 
     return created, updated
 
 
-def load_directory(files, type, jurisdiction_id, purge):
-    ids = set()
-    created_count = 0
-    updated_count = 0
+class BulkChanges:
+    """
+    the creates, updates & sub-object changes for a batch of people or organizations
+
+    nothing is written until apply(), which uses one bulk query per model
+    """
+
+    def __init__(self, ModelCls):
+        self.ModelCls = ModelCls
+        self.created = []
+        self.updated = []
+        self.update_fields = set()
+        self.new_subobjects = defaultdict(list)
+        self.deleted_subobjects = defaultdict(list)
+        # what diff() found for each object, for --plan
+        self.plan = []
+
+    def diff_subobjects(self, owner, fieldname, objects, rows):
+        """ queue the sub-object changes, returns the rows to delete & objects to create """
+        related = self.ModelCls._meta.get_field(fieldname)
+        RelatedCls = related.related_model
+        owner_field = related.field.name
+
+        to_delete, to_create = diff_subobjects(rows, objects,
+                                               get_subobject_fields(self.ModelCls, fieldname))
+        self.deleted_subobjects[RelatedCls].extend(row.pk for row in to_delete)
+        self.new_subobjects[RelatedCls].extend(RelatedCls(**{owner_field: owner}, **obj)
+                                               for obj in to_create)
+        return to_delete, to_create
+
+    def diff(self, obj, fields, subobjects):
+        """
+        queue what it takes for obj (None if it doesn't exist yet) to match fields & the
+        subobjects dict, returns (obj, created, updated) like get_update_or_create
+        """
+        if obj is None:
+            obj = self.ModelCls(**fields)
+            self.created.append(obj)
+            for fieldname, objects in subobjects.items():
+                self.diff_subobjects(obj, fieldname, objects, ())
+            self.plan.append({'id': obj.id, 'action': 'create'})
+            return obj, True, any(subobjects.values())
+
+        changed_fields = {field: [plan_value(getattr(obj, field)), plan_value(value)]
+                          for field, value in fields.items() if getattr(obj, field) != value}
+        if changed_fields:
+            set_fields(obj, fields)
+            self.update_fields.update(field for field in fields if field != 'id')
+
+        changed_subobjects = {}
+        for fieldname, objects in subobjects.items():
+            to_delete, to_create = self.diff_subobjects(obj, fieldname, objects,
+                                                        getattr(obj, fieldname).all())
+            if to_delete or to_create:
+                key_fields = get_subobject_fields(self.ModelCls, fieldname)
+                changed_subobjects[fieldname] = {
+                    'removed': [dict(zip(key_fields, subobject_key(row, key_fields)))
+                                for row in to_delete],
+                    'added': [dict(zip(key_fields, subobject_key(item, key_fields)))
+                              for item in to_create],
+                }
+
+        updated = bool(changed_fields or changed_subobjects)
+        if updated:
+            self.updated.append(obj)
+            self.plan.append({'id': obj.id, 'action': 'update', 'fields': changed_fields,
+                              'subobjects': changed_subobjects})
+        return obj, False, updated
+
+    def apply(self):
+        self.ModelCls.objects.bulk_create(self.created)
+        for RelatedCls, ids in self.deleted_subobjects.items():
+            if ids:
+                RelatedCls.objects.filter(pk__in=ids).delete()
+        for RelatedCls, objs in self.new_subobjects.items():
+            if objs:
+                RelatedCls.objects.bulk_create(objs)
+        if self.updated:
+            # bulk_update doesn't touch auto_now fields
+            now = timezone.now()
+            for obj in self.updated:
+                obj.updated_at = now
+            self.ModelCls.objects.bulk_update(self.updated,
+                                              sorted(self.update_fields | {'updated_at'}))
+        return {obj.id for obj in self.created}, {obj.id for obj in self.updated}
+
+
+def diff_person(changes, person, data, resolver):
+    """ queue the changes to make person (None for a new person) match data """
+    subobjects = get_person_subobjects(data)
+    subobjects['memberships'] = get_person_memberships(data, resolver)
+    person, created, updated = changes.diff(person, get_person_fields(data), subobjects)
+    # committee memberships can refer to people that aren't in the database yet
+    resolver.add_person(person)
+    return person, created, updated
+
+
+def diff_org(changes, org, data, resolver):
+    """ queue the changes to make org (None for a new organization) match data """
+    fields = get_org_fields(data, resolver.get_parent(data), org)
+    org, created, updated = changes.diff(org, fields,
+                                         {'links': data.get('links', []),
+                                          'sources': data.get('sources', []),
+                                          'memberships': get_org_memberships(data, resolver)})
+    # a parent from this batch won't be in the database yet
+    resolver.add_organization(org)
+    return org, created, updated
+
+
+def get_person_changes(records, resolver):
+    """
+    a BulkChanges with everything needed to load a list of parsed people
+
+    existing people & their sub-objects are read in a few prefetching queries & compared
+    in memory, so the number of queries doesn't grow with the number of files
+    """
+    from django.db.models import Prefetch
+    from opencivicdata.core.models import Person, Membership
+
+    existing = {person.id: person for person in Person.objects.filter(
+        id__in=[data['id'] for data in records]
+    ).prefetch_related(
+        'other_names', 'links', 'sources', 'identifiers', 'contact_details',
+        # as in load_person, committee memberships are left alone
+        Prefetch('memberships',
+                 queryset=Membership.objects.exclude(organization__classification='committee')),
+    )}
+
+    changes = BulkChanges(Person)
+    for data in records:
+        diff_person(changes, existing.get(data['id']), data, resolver)
+    return changes
+
+
+def get_org_changes(records, resolver):
+    """ a BulkChanges with everything needed to load a list of parsed organizations """
+    from opencivicdata.core.models import Organization
+
+    existing = {org.id: org for org in Organization.objects.filter(
+        id__in=[data['id'] for data in records]
+    ).select_related('parent').prefetch_related('links', 'sources', 'memberships')}
+
+    changes = BulkChanges(Organization)
+    for data in records:
+        diff_org(changes, existing.get(data['id']), data, resolver)
+    return changes
+
+
+def bulk_load_people(records, resolver=None):
+    """ load a list of parsed people, returning the sets of created & updated ids """
+    return get_person_changes(records, resolver or Resolver()).apply()
+
+
+def bulk_load_orgs(records, resolver=None):
+    """ load a list of parsed organizations, returning the sets of created & updated ids """
+    return get_org_changes(records, resolver or Resolver()).apply()
+
+
+def copy_value(field, value):
+    """ a value in COPY's text format """
+    from django.contrib.postgres.fields import ArrayField
+
+    if value is None:
+        return '\\N'
+    elif isinstance(field, ArrayField):
+        value = '{' + ','.join('"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"'
+                               for item in value) + '}'
+    elif isinstance(value, dict):
+        value = json.dumps(value)
+    elif isinstance(value, datetime.datetime):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return (value.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def copy_insert(ModelCls, objs):
+    """
+    insert unsaved objs by streaming them into a staging table with COPY & then inserting
+    everything from there with a single statement
+    """
+    if not objs:
+        return
+    fields = ModelCls._meta.concrete_fields
+    table = connection.ops.quote_name(ModelCls._meta.db_table)
+    staging = connection.ops.quote_name('staging_' + ModelCls._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+
+    buffer = io.StringIO()
+    for obj in objs:
+        # pre_save fills in auto_now fields & turns foreign keys into ids
+        buffer.write('\t'.join(copy_value(field, field.pre_save(obj, add=True))
+                               for field in fields) + '\n')
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TEMPORARY TABLE {staging} (LIKE {table} INCLUDING DEFAULTS)')
+        copy_sql = f'COPY {staging} ({columns}) FROM STDIN'
+        # the execute_wrapper never sees COPY, so it's timed here for --profile
+        with untracked_query(copy_sql):
+            cursor.copy_expert(copy_sql, buffer)
+        cursor.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging}')
+        cursor.execute(f'DROP TABLE {staging}')
+
+
+def cold_load(person_files, committee_files, jurisdiction_id, snapshot=None, resolver=None,
+              parse_jobs=1):
+    """
+    load a jurisdiction that has nothing in the database yet using COPY
+
+    returns person & organization summaries like load_directory's, or None without making
+    any changes if any of the people or committees already exist
+    """
+    from django.db.models import Q
+    from opencivicdata.core.models import Person, Organization
+
+    if resolver is None:
+        resolver = Resolver()
+
+    people = [data for filename, data, unchanged
+              in parse_files(person_files, snapshot, parse_jobs=parse_jobs)]
+    orgs = [data for filename, data, unchanged
+            in parse_files(committee_files, snapshot, parse_jobs=parse_jobs)]
+    if (Person.objects.filter(Q(id__in=[data['id'] for data in people]) |
+                              Q(memberships__organization__jurisdiction_id=jurisdiction_id)
+                              ).exists() or
+            Organization.objects.filter(Q(id__in=[data['id'] for data in orgs]) |
+                                        Q(jurisdiction_id=jurisdiction_id,
+                                          classification='committee')).exists()):
+        return None
+
+    person_changes = BulkChanges(Person)
+    for data in people:
+        diff_person(person_changes, None, data, resolver)
+    org_changes = BulkChanges(Organization)
+    for data in orgs:
+        diff_org(org_changes, None, data, resolver)
+
+    # foreign keys are only checked at commit, so the order of tables doesn't matter
+    objs = defaultdict(list)
+    for changes in (person_changes, org_changes):
+        objs[changes.ModelCls].extend(changes.created)
+        for RelatedCls, subobjects in changes.new_subobjects.items():
+            objs[RelatedCls].extend(subobjects)
+    for ModelCls, model_objs in objs.items():
+        copy_insert(ModelCls, model_objs)
+
+    click.secho(f'cold loaded {len(people)} people & {len(orgs)} committees', fg='green')
+    return tuple({'created': len(records), 'updated': 0, 'unchanged': 0, 'purged': 0}
+                 for records in (people, orgs))
+
+
+def get_fingerprint(data):
+    """ a hash of a parsed file, stored in extras so an unchanged file can be skipped """
+    content = json.dumps([FINGERPRINT_VERSION, data], sort_keys=True, default=str)
+    return hashlib.sha1(content.encode('utf8')).hexdigest()
+
+
+def parse_file(filename, snapshot=None):
+    """ (filename, data, fingerprint), this is what the parse worker processes run """
+    data = load_file(filename, snapshot)
+    return filename, data, get_fingerprint(data)
+
+
+def parse_pipelined(files, parse_jobs, queue_size=PARSE_QUEUE_SIZE):
+    """
+    yields parse_file's results in file order while a pool of parse_jobs processes parses
+    the files ahead, at most queue_size files are parsed & waiting to be used at a time
+    """
+    files = iter(files)
+    with ProcessPoolExecutor(max_workers=parse_jobs) as pool:
+        pending = deque(pool.submit(parse_file, filename)
+                        for filename in islice(files, queue_size))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                for filename in islice(files, 1):
+                    pending.append(pool.submit(parse_file, filename))
+                yield result
+        finally:
+            # if loading stopped early, don't parse the rest of the queue
+            for future in pending:
+                future.cancel()
+
+
+def parse_files(files, snapshot=None, fingerprints=None, parse_jobs=1):
+    """
+    yields (filename, data, unchanged) for each file
+
+    unchanged is True if the file's fingerprint matches the one in fingerprints, otherwise
+    the fingerprint is added to data's extras to be saved with the rest of the object
+
+    with parse_jobs > 1 files are parsed in worker processes while the caller writes the
+    earlier ones to the database, a snapshot is already parsed so it's always read here
+    """
+    if parse_jobs > 1 and not snapshot:
+        results = parse_pipelined(files, parse_jobs)
+    else:
+        results = (parse_file(filename, snapshot) for filename in files)
+
+    for filename, data, fingerprint in results:
+        if fingerprints and fingerprints.get(data['id']) == fingerprint:
+            yield filename, data, True
+        else:
+            data['extras'] = dict(data.get('extras', {}), **{FINGERPRINT_KEY: fingerprint})
+            yield filename, data, False
+
+
+def load_files(parsed, load_func):
+    """ yields (filename, id, created, updated, unchanged), loading one file at a time """
+    for filename, data, unchanged in parsed:
+        if unchanged:
+            yield filename, data['id'], False, False, True
+        else:
+            with profile_file(filename):
+                created, updated = load_func(data)
+            yield filename, data['id'], created, updated, False
+
+
+def bulk_load_files(parsed, bulk_load_func):
+    """ the same as load_files, but every changed file is loaded in a single batch """
+    parsed = list(parsed)
+    created_ids, updated_ids = bulk_load_func([data for filename, data, unchanged in parsed
+                                               if not unchanged])
+    for filename, data, unchanged in parsed:
+        yield (filename, data['id'], data['id'] in created_ids, data['id'] in updated_ids,
+               unchanged)
+
+
+def get_existing(type, jurisdiction_id):
+    """ {id: extras} for the jurisdiction's people or committees in the database """
+    from opencivicdata.core.models import Person, Organization
 
     if type == 'person':
-        from opencivicdata.core.models import Person
-        existing_ids = set(Person.objects.filter(
+        return dict(Person.objects.filter(
             memberships__organization__jurisdiction_id=jurisdiction_id
-        ).values_list('id', flat=True))
-        ModelCls = Person
-        load_func = load_person
+        ).values_list('id', 'extras'))
     elif type == 'organization':
-        from opencivicdata.core.models import Organization
-        existing_ids = set(Organization.objects.filter(
+        return dict(Organization.objects.filter(
             jurisdiction_id=jurisdiction_id,
             classification='committee',
-        ).values_list('id', flat=True))
-        ModelCls = Organization
-        load_func = load_org
+        ).values_list('id', 'extras'))
+    else:
+        raise ValueError(type)
+
+
+def get_fingerprints(existing):
+    return {id: extras.get(FINGERPRINT_KEY) for id, extras in existing.items()}
+
+
+def count_plan(plan, unchanged):
+    """ a plan's summary dict, as load_parsed & purge_missing would count the changes """
+    counts = Counter(entry['action'] for entry in plan)
+    return {'created': counts['create'], 'updated': counts['update'], 'unchanged': unchanged,
+            'purged': counts['purge']}
+
+
+def plan_directory(files, type, jurisdiction_id, purge, snapshot=None, resolver=None,
+                   force=False, parse_jobs=1):
+    """
+    the changes load_directory would make, without writing anything
+
+    returns a list of dicts with the id, file & action (create, update, purge or missing
+    if it'd stop the import without --purge), updates also list the changed fields &
+    sub-objects, and the summary dict load_directory would return
+    """
+    if resolver is None:
+        resolver = Resolver()
+
+    with phase('existing-id scan'):
+        existing = get_existing(type, jurisdiction_id)
+
+    with phase(f'{type} plan'):
+        filenames = {}
+        records = []
+        skipped = 0
+        for filename, data, unchanged in parse_files(
+                files, snapshot, None if force else get_fingerprints(existing), parse_jobs):
+            filenames[data['id']] = filename
+            if unchanged:
+                skipped += 1
+            else:
+                records.append(data)
+
+        if type == 'person':
+            changes = get_person_changes(records, resolver)
+        else:
+            changes = get_org_changes(records, resolver)
+
+    missing_ids = set(existing) - set(filenames)
+    if type == 'person':
+        # as load_directory does, so committees are planned without the removed people
+        resolver.exclude_people(missing_ids)
+
+    plan = []
+    for entry in changes.plan:
+        plan.append(dict(entry, type=type, file=filenames[entry['id']]))
+    for id in sorted(missing_ids):
+        plan.append({'id': id, 'action': 'purge' if purge else 'missing', 'type': type,
+                     'file': None})
+    return plan, count_plan(plan, skipped)
+
+
+def get_loaders(type):
+    """ (ModelCls, load_func, bulk_load_func) for person or organization files """
+    from opencivicdata.core.models import Person, Organization
+    if type == 'person':
+        return Person, load_person, bulk_load_people
+    elif type == 'organization':
+        return Organization, load_org, bulk_load_orgs
     else:
         raise ValueError(type)
 
-    for filename in files:
-        with open(filename) as f:
-            data = yaml.load(f)
-            ids.add(data['id'])
-            created, updated = load_func(data)
 
-        if created:
-            click.secho(f'created {type} from {filename}', fg='cyan', bold=True)
-        elif updated:
-            click.secho(f'updated {type} from {filename}', fg='cyan')
+def load_parsed(parsed, type, bulk=False, resolver=None):
+    """ load parse_files' results, returns a summary dict & the set of ids seen """
+    ModelCls, load_func, bulk_load_func = get_loaders(type)
+    if resolver is None:
+        resolver = Resolver()
+    if bulk:
+        results = bulk_load_files(parsed, partial(bulk_load_func, resolver=resolver))
+    else:
+        results = load_files(parsed, partial(load_func, resolver=resolver))
+
+    ids = set()
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'purged': 0}
+    with phase(f'{type} load'):
+        for filename, id, created, updated, unchanged in results:
+            ids.add(id)
+            if unchanged:
+                counts['unchanged'] += 1
+            elif created:
+                counts['created'] += 1
+                click.secho(f'created {type} from {filename}', fg='cyan', bold=True)
+            elif updated:
+                counts['updated'] += 1
+                click.secho(f'updated {type} from {filename}', fg='cyan')
+    return counts, ids
+
 
-    missing_ids = existing_ids - ids
+def purge_missing(type, missing_ids, purge):
+    """ delete the people or committees that have no file, or cancel if purge isn't set """
     if missing_ids and not purge:
         click.secho(f'{len(missing_ids)} went missing, run with --purge to remove',
                     fg='red')
@@ -229,12 +853,115 @@ def load_directory(files, type, jurisdiction_id, purge):
         raise CancelTransaction()
     elif missing_ids and purge:
         click.secho(f'{len(missing_ids)} purged', fg='yellow')
-        ModelCls.objects.filter(id__in=missing_ids).delete()
+        with phase('purge'):
+            get_loaders(type)[0].objects.filter(id__in=missing_ids).delete()
+    return len(missing_ids)
+
+
+def print_processed(type, ids, counts):
+    click.secho(f'processed {len(ids)} {type} files, {counts["created"]} created, '
+                f'{counts["updated"]} updated, {counts["unchanged"]} unchanged', fg='green')
+
+
+def load_directory(files, type, jurisdiction_id, purge, snapshot=None, bulk=False,
+                   resolver=None, force=False, parse_jobs=1):
+    with phase('existing-id scan'):
+        existing = get_existing(type, jurisdiction_id)
+    parsed = parse_files(files, snapshot, None if force else get_fingerprints(existing),
+                         parse_jobs)
+    if resolver is None:
+        resolver = Resolver()
+    counts, ids = load_parsed(parsed, type, bulk, resolver)
+    if type == 'person':
+        resolver.exclude_people(set(existing) - ids)
+    counts['purged'] = purge_missing(type, set(existing) - ids, purge)
 
     # TODO: check new_ids?
     # new_ids = ids - existing_ids
-    click.secho(f'processed {len(ids)} {type} files, {created_count} created, '
-                f'{updated_count} updated', fg='green')
+    print_processed(type, ids, counts)
+    return counts
+
+
+class Checkpoint:
+    """
+    the ids & fingerprints of the files a chunked import has committed
+
+    a re-run after a failure skips files that are unchanged since they were committed,
+    even with --force, the file is removed once the whole import has succeeded
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.fingerprints = {}
+        try:
+            with open(filename) as f:
+                for line in f:
+                    id, fingerprint = line.split()
+                    self.fingerprints[id] = fingerprint
+        except FileNotFoundError:
+            pass
+
+    def add(self, parsed):
+        """ record parse_files' results for the files loaded by a committed transaction """
+        with open(self.filename, 'a') as f:
+            for filename, data, unchanged in parsed:
+                if not unchanged:
+                    f.write(f'{data["id"]} {data["extras"][FINGERPRINT_KEY]}\n')
+                    self.fingerprints[data['id']] = data['extras'][FINGERPRINT_KEY]
+            f.flush()
+            os.fsync(f.fileno())
+
+    def remove(self):
+        try:
+            os.remove(self.filename)
+        except FileNotFoundError:
+            pass
+
+
+def get_chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunk_size))
+
+
+def load_directory_chunked(files, type, jurisdiction_id, chunk_size, checkpoint,
+                           snapshot=None, bulk=False, resolver=None, force=False,
+                           parse_jobs=1):
+    """
+    load_directory without a surrounding transaction, committing every chunk_size files in
+    a transaction of its own & recording them in checkpoint
+
+    nothing is purged, returns a summary dict & the ids that are in the database but
+    have no file, for the caller to purge once every chunk has been committed
+
+    if a chunk is cancelled, e.g. by an unknown post, it's rolled back & the summary of the
+    chunks committed before it is returned with None for the missing ids
+    """
+    with phase('existing-id scan'):
+        existing = get_existing(type, jurisdiction_id)
+    fingerprints = {} if force else get_fingerprints(existing)
+    fingerprints.update(checkpoint.fingerprints)
+
+    ids = set()
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'purged': 0}
+    try:
+        for chunk in get_chunks(parse_files(files, snapshot, fingerprints, parse_jobs),
+                                chunk_size):
+            with transaction.atomic():
+                lock_jurisdiction(jurisdiction_id)
+                chunk_counts, chunk_ids = load_parsed(chunk, type, bulk, resolver)
+            checkpoint.add(chunk)
+            ids |= chunk_ids
+            for key, value in chunk_counts.items():
+                counts[key] += value
+    except CancelTransaction:
+        print_processed(type, ids, counts)
+        return counts, None
+
+    print_processed(type, ids, counts)
+    return counts, set(existing) - ids
 
 
 def init_django():
@@ -260,33 +987,323 @@ def init_django():
     django.setup()
 
 
-@click.command()
-@click.argument('abbr', default='*')
-@click.option('-v', '--verbose', count=True)
-@click.option('--summary/--no-summary', default=False)
-@click.option('--purge/--no-purge', default=False)
-@click.option('--safe/--no-safe', default=False)
-def to_database(abbr, verbose, summary, purge, safe):
-    init_django()
+def lock_jurisdiction(jurisdiction_id):
+    """
+    wait for any other transaction importing this jurisdiction to finish
+
+    the advisory lock is released when the current transaction commits or rolls back
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [jurisdiction_id])
+
+
+def get_files(abbr):
+    """ (person_files, committee_files) for a jurisdiction, sorted so chunks are stable """
     directory = get_data_dir(abbr)
+    person_files = (sorted(glob.glob(os.path.join(directory, 'people/*.yml'))) +
+                    sorted(glob.glob(os.path.join(directory, 'retired/*.yml'))))
+    committee_files = sorted(glob.glob(os.path.join(directory, 'organizations/*.yml')))
+    return person_files, committee_files
+
+
+def plan_jurisdiction(abbr, purge=False, snapshot=None, force=False, parse_jobs=1):
+    """ import_jurisdiction's summary with the plan_directory changes instead of making them """
     jurisdiction_id = get_jurisdiction_id(abbr)
+    person_files, committee_files = get_files(abbr)
+    resolver = Resolver()
+    summary = {'abbr': abbr, 'status': 'planned', 'plan': [],
+               'person': count_plan([], 0), 'organization': count_plan([], 0)}
+
+    # SET TRANSACTION READ ONLY would otherwise apply to (and outlive) an outer transaction
+    assert not connection.in_atomic_block, 'plan_jurisdiction must not run in a transaction'
+    try:
+        with transaction.atomic():
+            # nothing should be written, so make sure nothing can be
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION READ ONLY')
+            for type, files in (('person', person_files), ('organization', committee_files)):
+                plan, summary[type] = plan_directory(files, type, jurisdiction_id, purge,
+                                                     snapshot, resolver, force, parse_jobs)
+                summary['plan'] += plan
+    except CancelTransaction:
+        # an unknown post or person would roll the import back, keep what was planned
+        summary['status'] = 'would cancel'
 
-    person_files = (glob.glob(os.path.join(directory, 'people/*.yml')) +
-                    glob.glob(os.path.join(directory, 'retired/*.yml')))
-    committee_files = glob.glob(os.path.join(directory, 'organizations/*.yml'))
+    if any(entry['action'] == 'missing' for entry in summary['plan']):
+        summary['status'] = 'would cancel'
+    return summary
 
-    if safe:
-        click.secho('running in safe mode, no changes will be made', fg='magenta')
+
+def print_plan(summaries, plan_format):
+    if plan_format == 'json':
+        click.echo(json.dumps([dict(entry, abbr=summary['abbr']) for summary in summaries
+                               for entry in summary.get('plan', [])], indent=2, default=str))
+        return
+
+    colors = {'create': 'cyan', 'update': 'cyan', 'purge': 'yellow', 'missing': 'red'}
+    for summary in summaries:
+        for entry in summary.get('plan', []):
+            click.secho(f'{summary["abbr"]:6} {entry["type"]:12} {entry["action"]:8} '
+                        f'{entry["id"]} {entry["file"] or ""}', fg=colors[entry['action']])
+            for field, (old, new) in entry.get('fields', {}).items():
+                click.secho(f'    {field}: {old!r} -> {new!r}')
+            for fieldname, changes in entry.get('subobjects', {}).items():
+                for sign, key in (('-', 'removed'), ('+', 'added')):
+                    for item in changes[key]:
+                        values = ' '.join(f'{k}={v!r}' for k, v in item.items() if v)
+                        click.secho(f'    {sign} {fieldname} {values}',
+                                    fg='red' if sign == '-' else 'green')
+
+
+def import_jurisdiction(abbr, purge=False, safe=False, snapshot=None, bulk=False,
+                        force=False, cold=False, parse_jobs=1):
+    """ load a jurisdiction's people & committees in one transaction, returns a summary dict """
+    jurisdiction_id = get_jurisdiction_id(abbr)
+    person_files, committee_files = get_files(abbr)
+
+    resolver = Resolver()
+    summary = {'abbr': abbr, 'status': 'committed'}
 
     try:
         with transaction.atomic():
-            load_directory(person_files, 'person', jurisdiction_id, purge=purge)
-            load_directory(committee_files, 'organization', jurisdiction_id, purge=purge)
+            lock_jurisdiction(jurisdiction_id)
+            loaded = None
+            if cold:
+                with phase('cold load'):
+                    loaded = cold_load(person_files, committee_files, jurisdiction_id,
+                                       snapshot, resolver, parse_jobs)
+                if loaded is None:
+                    click.secho(f'{abbr} is already in the database, not cold loading',
+                                fg='yellow')
+            if loaded:
+                summary['person'], summary['organization'] = loaded
+            else:
+                summary['person'] = load_directory(
+                    person_files, 'person', jurisdiction_id, purge=purge, snapshot=snapshot,
+                    bulk=bulk, resolver=resolver, force=force, parse_jobs=parse_jobs)
+                summary['organization'] = load_directory(
+                    committee_files, 'organization', jurisdiction_id, purge=purge,
+                    snapshot=snapshot, bulk=bulk, resolver=resolver, force=force,
+                    parse_jobs=parse_jobs)
             if safe:
                 click.secho('ran in safe mode, no changes were made', fg='magenta')
                 raise CancelTransaction()
     except CancelTransaction:
-        pass
+        summary['status'] = 'rolled back'
+
+    return summary
+
+
+def import_jurisdiction_chunked(abbr, chunk_size, checkpoint_dir=DEFAULT_CHECKPOINT_DIR,
+                                purge=False, snapshot=None, bulk=False, force=False,
+                                parse_jobs=1):
+    """
+    import_jurisdiction committing every chunk_size files, anything missing is purged in a
+    final transaction once every chunk has been committed
+
+    people whose files were removed are known before any committee is loaded, without
+    --purge the import stops there rather than committing committees
+
+    a failed import can be re-run to resume from the checkpoint in checkpoint_dir
+    """
+    jurisdiction_id = get_jurisdiction_id(abbr)
+    person_files, committee_files = get_files(abbr)
+
+    resolver = Resolver()
+    summary = {'abbr': abbr, 'status': 'committed'}
+
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(checkpoint_dir, f'{abbr}.checkpoint'))
+    if checkpoint.fingerprints:
+        click.secho(f'resuming {abbr}, {len(checkpoint.fingerprints)} files were committed '
+                    'by an earlier run', fg='yellow')
+
+    missing_ids = {}
+    for type, files in (('person', person_files), ('organization', committee_files)):
+        summary[type], missing_ids[type] = load_directory_chunked(
+            files, type, jurisdiction_id, chunk_size, checkpoint, snapshot=snapshot, bulk=bulk,
+            resolver=resolver, force=force, parse_jobs=parse_jobs)
+        if missing_ids[type] is None:
+            # what was committed stays committed & recorded in the checkpoint
+            click.secho(f'{abbr} stopped at a cancelled {type} chunk, fix it & re-run to '
+                        f'resume from {checkpoint.filename}', fg='red')
+            summary['status'] = 'failed'
+            return summary
+        if type == 'person':
+            # as in import_jurisdiction, no committee may keep or gain a removed member
+            resolver.exclude_people(missing_ids['person'])
+            if missing_ids['person'] and not purge:
+                # the single transaction would be cancelled here, before any committee
+                try:
+                    purge_missing('person', missing_ids['person'], purge)
+                except CancelTransaction:
+                    summary['status'] = 'not purged'
+                    return summary
+
+    try:
+        with transaction.atomic():
+            lock_jurisdiction(jurisdiction_id)
+            for type in ('person', 'organization'):
+                summary[type]['purged'] = purge_missing(type, missing_ids[type], purge)
+    except CancelTransaction:
+        # the chunks stay committed, as does the checkpoint so a re-run only has to purge
+        summary['status'] = 'not purged'
+        return summary
+
+    checkpoint.remove()
+    return summary
+
+
+def run_jurisdiction(abbr, purge, safe, snapshot, bulk, force, cold, plan, profile,
+                     parse_jobs=1, chunk_size=None, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+    """
+    import or plan a jurisdiction, if profile is set its queries are recorded by a
+    QueryProfiler that's added to the summary
+    """
+    if plan:
+        func, args = plan_jurisdiction, (abbr, purge, snapshot, force, parse_jobs)
+    elif chunk_size:
+        func, args = import_jurisdiction_chunked, (abbr, chunk_size, checkpoint_dir, purge,
+                                                   snapshot, bulk, force, parse_jobs)
+    else:
+        func, args = import_jurisdiction, (abbr, purge, safe, snapshot, bulk, force, cold,
+                                           parse_jobs)
+    if not profile:
+        return func(*args)
+
+    profiler = QueryProfiler()
+    with connection.execute_wrapper(profiler), profiler.activate():
+        summary = func(*args)
+    summary['profile'] = profiler
+    return summary
+
+
+def run_jurisdiction_isolated(abbr, *args):
+    """
+    run_jurisdiction, but an exception only fails this jurisdiction, it's logged with its
+    traceback & a failed summary is returned so the others still run
+    """
+    try:
+        return run_jurisdiction(abbr, *args)
+    except Exception:
+        click.secho(f'{abbr} failed:\n{traceback.format_exc()}', fg='red')
+        return {'abbr': abbr, 'status': 'failed'}
+
+
+def import_jurisdiction_worker(*args):
+    """ run_jurisdiction in a pool process, which needs Django & a connection of its own """
+    if not conf.settings.configured:
+        init_django()
+    try:
+        return run_jurisdiction_isolated(*args)
+    finally:
+        connection.close()
+
+
+def import_parallel(abbrs, jobs, *args):
+    """ run each jurisdiction in a pool of worker processes, returns summaries in order """
+    summaries = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(import_jurisdiction_worker, abbr, *args) for abbr in abbrs]
+        for abbr, future in zip(abbrs, futures):
+            # workers catch their own errors, this is for the pool itself breaking
+            try:
+                summaries.append(future.result())
+            except Exception as e:
+                click.secho(f'{abbr}: {e!r}', fg='red')
+                summaries.append({'abbr': abbr, 'status': 'failed'})
+    return summaries
+
+
+def print_summaries(summaries):
+    click.secho(f'{"":6} {"":12} {"people":>26}   {"committees":>26}', bold=True)
+    click.secho(f'{"abbr":6} {"status":12} ' +
+                '   '.join(f'{"created":>8} {"updated":>8} {"purged":>8}' for _ in range(2)),
+                bold=True)
+    for summary in summaries:
+        counts = []
+        for type in ('person', 'organization'):
+            if type in summary:
+                counts.append('{created:8d} {updated:8d} {purged:8d}'.format(**summary[type]))
+            else:
+                counts.append(f'{"-":>8} {"-":>8} {"-":>8}')
+        color = {'committed': 'green', 'failed': 'red'}.get(summary['status'], 'yellow')
+        click.secho(f'{summary["abbr"]:6} {summary["status"]:12} ' + '   '.join(counts),
+                    fg=color)
+
+
+@click.command()
+@click.argument('abbr', default='*')
+@click.option('-v', '--verbose', count=True)
+@click.option('--summary/--no-summary', default=False)
+@click.option('--purge/--no-purge', default=False)
+@click.option('--safe/--no-safe', default=False)
+@click.option('--snapshot', 'snapshot_file', type=click.Path(dir_okay=False),
+              help='read parsed files from (and update) a snapshot made by snapshot.py')
+@click.option('--bulk/--no-bulk', default=False,
+              help='diff each directory against the database in memory & write in bulk')
+@click.option('--force/--no-force', default=False,
+              help='reload files even if they are unchanged since the last import')
+@click.option('-j', '--jobs', default=1, type=click.IntRange(1),
+              help='number of jurisdictions to import in parallel')
+@click.option('--parse-jobs', default=1, type=click.IntRange(1),
+              help='processes parsing YAML files while earlier ones are written')
+@click.option('--chunk-size', type=click.IntRange(1),
+              help='commit every this many files instead of once per jurisdiction')
+@click.option('--checkpoint-dir', default=DEFAULT_CHECKPOINT_DIR,
+              type=click.Path(file_okay=False),
+              help='where --chunk-size records committed files so failed imports resume')
+@click.option('--cold-load', 'cold', is_flag=True,
+              help='load jurisdictions with nothing in the database yet using COPY')
+@click.option('--plan', is_flag=True,
+              help='only read from the database & print the changes an import would make')
+@click.option('--plan-format', default='table', type=click.Choice(['table', 'json']))
+@click.option('--profile', is_flag=True,
+              help='count & time queries by phase, file & query shape')
+@click.option('--profile-json', type=click.Path(dir_okay=False),
+              help='also write the --profile results to this JSON file')
+def to_database(abbr, verbose, summary, purge, safe, snapshot_file, bulk, force, jobs,
+                parse_jobs, chunk_size, checkpoint_dir, cold, plan, plan_format, profile,
+                profile_json):
+    if chunk_size and (safe or cold):
+        raise click.UsageError('--chunk-size commits as it goes, it can\'t be combined with '
+                               '--safe or --cold-load')
+    abbrs = get_all_abbrs() if abbr == '*' else [abbr]
+
+    snapshot = open_refreshed(snapshot_file, abbrs) if snapshot_file else None
+
+    if safe:
+        click.secho('running in safe mode, no changes will be made', fg='magenta')
+
+    profile = profile or bool(profile_json)
+    args = (purge, safe, snapshot, bulk, force, cold, plan, profile, parse_jobs, chunk_size,
+            checkpoint_dir)
+    if jobs > 1 and len(abbrs) > 1:
+        summaries = import_parallel(abbrs, jobs, *args)
+    else:
+        init_django()
+        # one jurisdiction failing doesn't stop the others, each has its own transaction
+        summaries = [run_jurisdiction_isolated(abbr, *args) for abbr in abbrs]
+
+    if plan:
+        print_plan(summaries, plan_format)
+    if len(abbrs) > 1 and not (plan and plan_format == 'json'):
+        print_summaries(summaries)
+
+    if profile:
+        profiler = QueryProfiler()
+        for summary in summaries:
+            if 'profile' in summary:
+                profiler.merge(summary['profile'], summary['abbr'])
+        profiler.print_report()
+        if profile_json:
+            with open(profile_json, 'w') as f:
+                json.dump(profiler.to_dict(), f, indent=2)
+
+    failed = [summary['abbr'] for summary in summaries if summary['status'] == 'failed']
+    if failed:
+        click.secho(f'failed: {", ".join(failed)}', fg='red')
+        sys.exit(1)
 
 
 if __name__ == '__main__':
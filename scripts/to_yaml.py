@@ -1,12 +1,22 @@
 #!/usr/bin/env python
+import re
 import glob
 import json
 import os
 import uuid
+import zipfile
+import tarfile
 import click
 from collections import defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from utils import (reformat_phone_number, reformat_address, get_data_dir, get_jurisdiction_id,
-                   dump_obj)
+                   dump_obj, load_yaml)
+
+# scraped files are named <type>_<id>.json, in the order they have to be processed
+SCRAPE_TYPES = ('organization', 'membership', 'person')
+# scraped files are small, so workers decode them in batches
+JSON_CHUNK_SIZE = 64
+TAR_SUFFIXES = ('.tar.gz', '.tgz', '.tar')
 
 
 def process_link(link):
@@ -19,25 +29,226 @@ def ocd_uuid(type):
     return 'ocd-{}/{}'.format(type, uuid.uuid4())
 
 
-def process_dir(input_dir, output_dir, jurisdiction_id):
+def normalize_name(name):
+    return ' '.join(re.sub(r'[^\w\s]', '', name.lower()).split())
+
+
+def get_person_keys(person):
+    """ keys that identify a person from one scrape to the next, most reliable first """
+    keys = []
+    legacy_id = person.get('ids', {}).get('legacy_openstates')
+    if legacy_id:
+        keys.append(('legacy_openstates', legacy_id))
+    for identifier in person.get('other_identifiers', []):
+        keys.append((identifier['scheme'], identifier['identifier']))
+    name = normalize_name(person['name'])
+    for role in person.get('roles', []):
+        keys.append(('name', name, role['type'], str(role.get('district'))))
+    return keys
+
+
+def get_org_keys(org):
+    return [('committee', normalize_name(org['name']), org['parent'])]
+
+
+class IdentityIndex:
+    """
+    the people & committees already in a jurisdiction's data directory, so that converting
+    a new scrape keeps the ids & filenames of the ones it has in common
+
+    retired people are matched too (after current ones), so someone who comes back keeps
+    their id & is moved back to people/
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.filenames = {}
+        self.people = {}
+        self.orgs = {}
+        # {id: filename} of retired people
+        self.retired = {}
+        self.matched = set()
+
+        for directory, get_keys, index in (('people', get_person_keys, self.people),
+                                           ('retired', get_person_keys, self.people),
+                                           ('organizations', get_org_keys, self.orgs)):
+            for filename in sorted(glob.glob(os.path.join(output_dir, directory, '*.yml'))):
+                with open(filename) as f:
+                    obj = load_yaml(f)
+                self.filenames[obj['id']] = filename
+                if directory == 'retired':
+                    self.retired[obj['id']] = filename
+                for key in get_keys(obj):
+                    index.setdefault(key, obj['id'])
+
+    def match(self, obj, index, keys):
+        """ give obj the id of the first existing object matching keys, returns its filename """
+        for key in keys:
+            id = index.get(key)
+            # each existing object is only matched once, later matches get new ids
+            if id and id not in self.matched:
+                self.matched.add(id)
+                obj['id'] = id
+                return self.filenames[id]
+        return None
+
+    def match_person(self, person):
+        """ like match, but a retired person's filename is the one they'll have in people/ """
+        filename = self.match(person, self.people, get_person_keys(person))
+        if person['id'] in self.retired:
+            filename = os.path.join(self.output_dir, 'people', os.path.basename(filename))
+        return filename
+
+    def unretire(self, person):
+        """ remove the retired file of a matched person, once they're written to people/ """
+        filename = self.retired.pop(person['id'], None)
+        if filename:
+            os.remove(filename)
+
+    def match_org(self, org):
+        return self.match(org, self.orgs, get_org_keys(org))
+
+
+def load_json(filename):
+    with open(filename) as f:
+        return json.load(f)
+
+
+def get_scrape_type(name):
+    """ organization, membership or person for a scraped file's name, otherwise None """
+    basename = os.path.basename(name)
+    type = basename.split('_', 1)[0]
+    if type in SCRAPE_TYPES and basename.endswith('.json'):
+        return type
+    return None
+
+
+def get_record_type(record):
+    """ the scrape type of a JSON lines record, from its _type or otherwise its fields """
+    if '_type' in record:
+        return record['_type'] if record['_type'] in SCRAPE_TYPES else None
+    elif 'person_id' in record:
+        return 'membership'
+    elif 'parent_id' in record:
+        return 'organization'
+    elif 'given_name' in record:
+        return 'person'
+    return None
+
+
+def scan_dir(input_dir):
+    """ {type: sorted filenames} for the scraped organizations, memberships & people """
+    files = {type: [] for type in SCRAPE_TYPES}
+    with os.scandir(input_dir) as entries:
+        for entry in entries:
+            type = get_scrape_type(entry.name)
+            if type:
+                files[type].append(entry.path)
+    for filenames in files.values():
+        filenames.sort()
+    return files
+
+
+def process_dir(input_dir, output_dir, jurisdiction_id, jobs=1, index=None):
+    """
+    convert a directory of scraped JSON, with jobs > 1 files are decoded by a pool of
+    worker processes, all three types are queued at once so people are decoded while
+    committees & memberships are being processed
+    """
+    files = scan_dir(input_dir)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            records = [pool.map(load_json, files[type], chunksize=JSON_CHUNK_SIZE)
+                       for type in SCRAPE_TYPES]
+            return process_records(*records, output_dir, jurisdiction_id, index)
+    else:
+        records = [map(load_json, files[type]) for type in SCRAPE_TYPES]
+        return process_records(*records, output_dir, jurisdiction_id, index)
+
+
+def read_zip(input_file, type):
+    """ yields the scraped records of one type, zip members can be read in any order """
+    with zipfile.ZipFile(input_file) as archive:
+        for name in sorted(archive.namelist()):
+            if get_scrape_type(name) == type:
+                with archive.open(name) as f:
+                    yield json.loads(f.read().decode('utf8'))
+
+
+def read_tar(input_file, type):
+    """
+    yields the scraped records of one type from a tar archive
+
+    compressed tar files can only be read front to back, so the archive is streamed once
+    per type rather than held in memory, records come back in archive order
+    """
+    with tarfile.open(input_file, 'r|*') as archive:
+        for member in archive:
+            if member.isfile() and get_scrape_type(member.name) == type:
+                yield json.loads(archive.extractfile(member).read().decode('utf8'))
+
+
+def read_jsonl(input_file, type):
+    """ yields the scraped records of one type from a file with one JSON record per line """
+    with open(input_file) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if get_record_type(record) == type:
+                    yield record
+
+
+def process_input(input_path, output_dir, jurisdiction_id, jobs=1, index=None):
+    """ convert a scrape directory, .tar.gz, .zip or JSON lines file, without extracting it """
+    if os.path.isdir(input_path):
+        return process_dir(input_path, output_dir, jurisdiction_id, jobs, index)
+    elif input_path.endswith('.zip'):
+        records = [read_zip(input_path, type) for type in SCRAPE_TYPES]
+    elif input_path.endswith(TAR_SUFFIXES):
+        records = [read_tar(input_path, type) for type in SCRAPE_TYPES]
+    elif input_path.endswith('.jsonl'):
+        records = [read_jsonl(input_path, type) for type in SCRAPE_TYPES]
+    else:
+        raise ValueError(f'{input_path} is not a directory, .tar.gz, .zip or .jsonl file')
+    return process_records(*records, output_dir, jurisdiction_id, index)
+
+
+def get_abbr(input_path):
+    """ abbr is the last piece of the input path, without any archive extension """
+    abbr = None
+    for piece in input_path.split('/')[::-1]:
+        if piece:
+            abbr = piece
+            break
+    for suffix in TAR_SUFFIXES + ('.zip', '.jsonl'):
+        if abbr.endswith(suffix):
+            return abbr[:-len(suffix)]
+    return abbr
+
+
+def process_records(orgs, memberships, people, output_dir, jurisdiction_id, index=None):
+    """
+    convert scraped organizations, then memberships, then people & write YAML
+
+    people & committees matching ones in index, by default the existing files in
+    output_dir, keep their ids & filenames, files are only written if their content
+    changed, returns the number of files written & left unchanged
+    """
+    if index is None:
+        index = IdentityIndex(output_dir)
+    counts = {'written': 0, 'unchanged': 0}
     person_memberships = defaultdict(list)
     # map both names & ids to people objects
     people_lookup = {}
     committees_by_id = {}
 
     # build list of committees
-    for filename in glob.glob(os.path.join(input_dir, 'organization_*.json')):
-        with open(filename) as f:
-            org = json.load(f)
-
+    for org in orgs:
         if org['classification'] == 'committee':
             committees_by_id[org['_id']] = process_org(org, jurisdiction_id)
 
     # collect memberships
-    for filename in glob.glob(os.path.join(input_dir, 'membership_*.json')):
-        with open(filename) as f:
-            membership = json.load(f)
-
+    for membership in memberships:
         if membership['organization_id'] in committees_by_id:
             committees_by_id[membership['organization_id']]['memberships'].append(membership)
         else:
@@ -46,17 +257,21 @@ def process_dir(input_dir, output_dir, jurisdiction_id):
             person_memberships[membership['person_id']].append(membership)
 
     # process people & store people by ID for committees
-    for filename in glob.glob(os.path.join(input_dir, 'person_*.json')):
-        with open(filename) as f:
-            person = json.load(f)
-
+    for person in people:
         scrape_id = person['_id']
         person['memberships'] = person_memberships[scrape_id]
         person = process_person(person, jurisdiction_id)
+        filename = index.match_person(person)
         people_lookup[scrape_id] = person
         people_lookup[person['name']] = person
 
-        dump_obj(person, output_dir=os.path.join(output_dir, 'people'))
+        if filename:
+            written = dump_obj(person, filename=filename, if_changed=True)
+        else:
+            written = dump_obj(person, output_dir=os.path.join(output_dir, 'people'),
+                               if_changed=True)
+        index.unretire(person)
+        counts['written' if written else 'unchanged'] += 1
 
     # resolve committee parents and members and write them out
     for org in committees_by_id.values():
@@ -66,7 +281,15 @@ def process_dir(input_dir, output_dir, jurisdiction_id):
         org['memberships'] = [process_committee_membership(m, people_lookup)
                               for m in org['memberships']]
 
-        dump_obj(org, output_dir=os.path.join(output_dir, 'organizations'))
+        filename = index.match_org(org)
+        if filename:
+            written = dump_obj(org, filename=filename, if_changed=True)
+        else:
+            written = dump_obj(org, output_dir=os.path.join(output_dir, 'organizations'),
+                               if_changed=True)
+        counts['written' if written else 'unchanged'] += 1
+
+    return counts
 
 
 def process_committee_membership(membership, people_lookup):
@@ -179,18 +402,19 @@ def process_org(org, jurisdiction_id):
 @click.command()
 @click.argument('input_dir')
 @click.option('--reset/--no-reset', default=False)
-def to_yaml(input_dir, reset):
+@click.option('-j', '--jobs', default=1, type=click.IntRange(1),
+              help='number of processes decoding scraped JSON in a directory')
+def to_yaml(input_dir, reset, jobs):
+    """
+    convert pupa scrape output to YAML, INPUT_DIR can also be a .tar.gz, .zip or
+    JSON lines file named after the jurisdiction
+    """
     # TODO: remove reset option once we're in prod
-
-    # abbr is last piece of directory name
-    abbr = None
-    for piece in input_dir.split('/')[::-1]:
-        if piece:
-            abbr = piece
-            break
-
+    abbr = get_abbr(input_dir)
     output_dir = get_data_dir(abbr)
     jurisdiction_id = get_jurisdiction_id(abbr)
+    # index the existing files before --reset removes them, so their ids are kept
+    index = IdentityIndex(output_dir)
 
     for dir in ('people', 'organizations'):
         try:
@@ -199,7 +423,9 @@ def to_yaml(input_dir, reset):
             if reset:
                 for file in glob.glob(os.path.join(output_dir, dir, '*.yml')):
                     os.remove(file)
-    process_dir(input_dir, output_dir, jurisdiction_id)
+    counts = process_input(input_dir, output_dir, jurisdiction_id, jobs, index)
+    click.secho(f'wrote {counts["written"]} files, {counts["unchanged"]} unchanged',
+                fg='green')
 
 
 if __name__ == '__main__':
@@ -5,9 +5,22 @@ import yaml
 import yamlordereddictloader
 from collections import defaultdict
 from yaml.representer import Representer
+from yaml_dump import dump_yaml
 # set up defaultdict representation
 yaml.add_representer(defaultdict, Representer.represent_dict)
 
+
+if yaml.__with_libyaml__:
+    class FastSafeLoader(yaml.CSafeLoader):
+        """ libyaml-backed equivalent of yamlordereddictloader.SafeLoader """
+        construct_yaml_map = yamlordereddictloader.SafeLoader.construct_yaml_map
+        construct_mapping = yamlordereddictloader.SafeLoader.construct_mapping
+
+    FastSafeLoader.add_constructor('tag:yaml.org,2002:map', FastSafeLoader.construct_yaml_map)
+    FastSafeLoader.add_constructor('tag:yaml.org,2002:omap', FastSafeLoader.construct_yaml_map)
+else:
+    FastSafeLoader = yamlordereddictloader.SafeLoader
+
 PHONE_RE = re.compile(r'''^
                       \D*(1?)\D*                                # prefix
                       (\d{3})\D*(\d{3})\D*(\d{4}).*?             # main 10 digits
@@ -39,8 +52,17 @@ def reformat_address(address):
     return re.sub(r'\s+', ' ', re.sub(r'\s*\n\s*', ';', address))
 
 
+# root of the data directories, benchmarks point this at a synthetic corpus
+DATA_ROOT = os.path.join(os.path.dirname(__file__), '../test/')
+
+
 def get_data_dir(abbr):
-    return os.path.join(os.path.dirname(__file__), '../test/', abbr)
+    return os.path.join(DATA_ROOT, abbr)
+
+
+def get_all_abbrs():
+    """ every jurisdiction with a data directory """
+    return sorted(d for d in os.listdir(DATA_ROOT) if os.path.isdir(os.path.join(DATA_ROOT, d)))
 
 
 def get_jurisdiction_id(abbr):
@@ -53,16 +75,38 @@ def get_jurisdiction_id(abbr):
 
 
 def load_yaml(file_obj):
-    return yaml.load(file_obj, Loader=yamlordereddictloader.SafeLoader)
+    """ load YAML from a file object, string or bytes, keeping the order of keys """
+    return yaml.load(file_obj, Loader=FastSafeLoader)
+
 
+def dump_obj(obj, *, output_dir=None, filename=None, if_changed=False):
+    """
+    write obj as YAML to filename or its get_filename() in output_dir, returns whether
+    the file was written
 
-def dump_obj(obj, *, output_dir=None, filename=None):
+    with if_changed a file that already has exactly this content is left alone, mtime &
+    all, writes go through a temp file that's renamed over filename so a partial file is
+    never seen
+    """
     if output_dir:
         filename = os.path.join(output_dir, get_filename(obj))
     if not filename:
         raise ValueError('must provide output_dir or filename parameter')
-    with open(filename, 'w') as f:
-        yaml.dump(obj, f, default_flow_style=False, Dumper=yamlordereddictloader.SafeDumper)
+
+    content = dump_yaml(obj).encode('utf8')
+    if if_changed:
+        try:
+            with open(filename, 'rb') as f:
+                if f.read() == content:
+                    return False
+        except FileNotFoundError:
+            pass
+
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_filename, filename)
+    return True
 
 
 def get_filename(obj):
@@ -73,6 +117,25 @@ def get_filename(obj):
     return f'{name}-{id}.yml'
 
 
-def role_is_active(role):
-    now = datetime.datetime.utcnow().date().strftime('%Y-%m-%d')
-    return role.get('end_date') is None or role.get('end_date') > now
+_as_of_date = None
+
+
+def set_as_of_date(date):
+    """ evaluate roles as of date (YYYY-MM-DD) instead of today, None resets to today """
+    global _as_of_date
+    _as_of_date = date
+
+
+def get_as_of_date():
+    """ the date roles are evaluated against, computed once per process """
+    global _as_of_date
+    if _as_of_date is None:
+        _as_of_date = datetime.datetime.utcnow().date().strftime('%Y-%m-%d')
+    return _as_of_date
+
+
+def role_is_active(role, date=None):
+    if date is None:
+        date = _as_of_date or get_as_of_date()
+    end_date = role.get('end_date')
+    return end_date is None or end_date > date
@@ -0,0 +1,186 @@
+import datetime
+from functools import lru_cache
+from collections import OrderedDict
+import yaml
+import yamlordereddictloader
+
+# PyYAML's defaults, which dump_obj uses
+BEST_WIDTH = 80
+# the emitter counts a key's '!!str' tag towards its 128 character limit
+MAX_KEY_LENGTH = 128 - len('!!str')
+STR_TAG = 'tag:yaml.org,2002:str'
+LEADING_INDICATORS = '#,[]{}&*!|>\'"%@`'
+
+_resolver = yaml.resolver.Resolver()
+
+
+class Unsupported(Exception):
+    """ raised by fast_dump for anything it can't guarantee to emit like PyYAML does """
+
+
+def generic_dump(obj):
+    return yaml.dump(obj, default_flow_style=False, Dumper=yamlordereddictloader.SafeDumper)
+
+
+def is_printable_ascii(text):
+    return not text or (' ' <= min(text) and max(text) <= '~')
+
+
+@lru_cache(maxsize=4096)
+def get_str_style(text):
+    """
+    the style PyYAML's emitter picks for a block context str, plain or single quoted,
+    this is Emitter.analyze_scalar & choose_scalar_style narrowed to printable ASCII
+    """
+    if not is_printable_ascii(text):
+        # needs escaping in double quotes
+        raise Unsupported(text)
+    if (text and
+            text[0] not in LEADING_INDICATORS and
+            not (text[0] in '?:-' and (len(text) == 1 or text[1] == ' ')) and
+            not text.startswith(('---', '...')) and
+            text[0] != ' ' and text[-1] != ' ' and
+            ': ' not in text and not text.endswith(':') and ' #' not in text and
+            _resolver.resolve(yaml.ScalarNode, text, (True, False)) == STR_TAG):
+        return 'plain'
+    return 'single'
+
+
+def fold(text, column, indent, quoted):
+    """
+    write text starting at column the way Emitter.write_plain/write_single_quoted do,
+    breaking lines at single spaces once past BEST_WIDTH & continuing at indent
+    """
+    if column + len(text) <= BEST_WIDTH or ' ' not in text:
+        return text
+    pieces = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = start
+        if text[start] == ' ':
+            while end < length and text[end] == ' ':
+                end += 1
+            if (end - start == 1 and column > BEST_WIDTH and
+                    not (quoted and (start == 1 or end == length - 1))):
+                pieces.append('\n' + ' ' * indent)
+                column = indent
+                start = end
+                continue
+        else:
+            while end < length and text[end] != ' ':
+                end += 1
+        pieces.append(text[start:end])
+        column += end - start
+        start = end
+    return ''.join(pieces)
+
+
+def get_scalar(value, seen):
+    """ (text, style) for a scalar value, style is None if it's never folded """
+    kind = type(value)
+    if kind is str:
+        style = get_str_style(value)
+        if style == 'single':
+            return "'" + value.replace("'", "''") + "'", style
+        return value, style
+    elif kind is bool:
+        return ('true' if value else 'false'), None
+    elif kind is int:
+        return str(value), None
+    elif value is None:
+        return 'null', None
+    elif kind is datetime.date:
+        # PyYAML would anchor a date object that appears twice
+        if id(value) in seen:
+            raise Unsupported(value)
+        seen.add(id(value))
+        return value.isoformat(), None
+    raise Unsupported(value)
+
+
+def get_items(mapping, seen):
+    if id(mapping) in seen:
+        raise Unsupported('repeated object')
+    seen.add(id(mapping))
+    if type(mapping) is OrderedDict:
+        return list(mapping.items())
+    elif type(mapping) is dict:
+        # like PyYAML's sort_keys, mixed key types raise TypeError in both
+        try:
+            return sorted(mapping.items())
+        except TypeError:
+            raise Unsupported(mapping)
+    raise Unsupported(mapping)
+
+
+def is_mapping(value):
+    return type(value) in (OrderedDict, dict)
+
+
+def write_value(out, value, column, indent, seen):
+    """ write a value after a 'key:' or '-' ending at column, nested content is at indent """
+    if is_mapping(value) or type(value) is list:
+        if id(value) in seen:
+            raise Unsupported('repeated object')
+        if not value:
+            seen.add(id(value))
+            out.append(' {}\n' if is_mapping(value) else ' []\n')
+            return False
+        return True
+
+    text, style = get_scalar(value, seen)
+    if style:
+        text = fold(text, column + 1, indent, style == 'single')
+    out.append(' ' + text + '\n')
+    return False
+
+
+def write_mapping(out, mapping, indent, seen, inline=False):
+    """ write a block mapping with keys at indent, the first on the current line if inline """
+    for n, (key, value) in enumerate(get_items(mapping, seen)):
+        # anything else would be written as a complex '? key'
+        if type(key) is not str or not 0 < len(key) < MAX_KEY_LENGTH:
+            raise Unsupported(key)
+        key_text, _ = get_scalar(key, seen)
+        if not (inline and n == 0):
+            out.append(' ' * indent)
+        out.append(key_text + ':')
+        if write_value(out, value, indent + len(key_text) + 1, indent + 2, seen):
+            out.append('\n')
+            if is_mapping(value):
+                write_mapping(out, value, indent + 2, seen)
+            else:
+                # sequences in mappings aren't indented
+                write_sequence(out, value, indent, seen)
+
+
+def write_sequence(out, sequence, indent, seen):
+    seen.add(id(sequence))
+    for item in sequence:
+        out.append(' ' * indent + '-')
+        if write_value(out, item, indent + 1, indent + 2, seen):
+            if not is_mapping(item):
+                raise Unsupported('nested sequence')
+            out.append(' ')
+            write_mapping(out, item, indent + 2, seen, inline=True)
+
+
+def fast_dump(obj):
+    """
+    obj as YAML byte-identical to generic_dump for the person & organization files,
+    mappings, lists & simple scalars, raises Unsupported for anything else
+    """
+    if not is_mapping(obj) or not obj:
+        raise Unsupported(obj)
+    out = []
+    write_mapping(out, obj, 0, set())
+    return ''.join(out)
+
+
+def dump_yaml(obj):
+    """ obj as YAML in dump_obj's format, falling back to PyYAML when fast_dump can't """
+    try:
+        return fast_dump(obj)
+    except Unsupported:
+        return generic_dump(obj)